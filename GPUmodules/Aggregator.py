@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+""" High rate sampling of Monitor sensors with the results aggregated for each display interval.
+    Samples are stored in a preallocated numpy buffer and reduced to min, mean, max, and last
+    values of each table parameter at the end of the interval.  This module requires numpy, so
+    it is only imported when aggregation is used.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import logging
+import warnings
+from typing import List
+
+import numpy as np
+
+from GPUmodules.GPUKeys import SensorSet
+from GPUmodules.GPUmodule import GpuList, GpuItem
+from GPUmodules.Sampling import SampleScheduler, AggregateValue, sample_value
+
+LOGGER = logging.getLogger('gpu-utils')
+
+
+class SampleAggregator:
+    """ Read the Monitor sensor set of a GpuList at the sample interval and aggregate the samples
+        of each display interval.
+    """
+    def __init__(self, gpu_list: GpuList, sample_interval: float, display_interval: float):
+        self.gpu_list = gpu_list
+        self.scheduler = SampleScheduler(sample_interval)
+        self.window_samples: int = max(1, round(display_interval / sample_interval))
+        self.fields: List[str] = GpuItem.set_aggregate_fields()
+        self.buffer = np.full((self.window_samples, len(gpu_list.list), len(self.fields)), np.nan)
+        self.count: int = 0
+        self.tick: int = -1
+        self.window_end: int = self.window_samples
+
+    def __repr__(self) -> str:
+        return 'SampleAggregator({} samples per window, fields={}, {})'.format(self.window_samples, self.fields,
+                                                                               self.scheduler)
+
+    def add_sample(self) -> None:
+        """ Store the current values of the GPUs as the next sample of the window.
+        """
+        sample = self.buffer[self.count]
+        for gpu_index, gpu in enumerate(self.gpu_list.gpus()):
+            gpu_sample = sample[gpu_index]
+            for field_index, field in enumerate(self.fields):
+                gpu_sample[field_index] = sample_value(gpu.get_snapshot_value(field))
+        self.count += 1
+
+    def read_window(self) -> None:
+        """ Read samples until the end of the current display interval, then set the aggregated
+            values of each GPU.  Deadlines missed by slow reads are skipped.
+        """
+        while True:
+            # The first sample is read immediately, others at the next sample deadline.
+            self.tick = self.tick + 1 + self.scheduler.wait() if self.tick >= 0 else 0
+            self.gpu_list.read_gpu_sensor_set(data_type=SensorSet.Monitor, interval=self.scheduler.interval)
+            self.add_sample()
+            if self.tick + 1 >= self.window_end or self.count == self.window_samples: break
+        self.window_end = ((self.tick + 1) // self.window_samples + 1) * self.window_samples
+        self.set_aggregate()
+
+    def set_aggregate(self) -> None:
+        """ Set the aggregated values of the samples in the buffer for each GPU and start a new window.
+        """
+        samples = self.buffer[:self.count]
+        # All nan fields, such as unsupported sensors, are expected and result in nan.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            sample_min = np.round(np.nanmin(samples, axis=0), 3)
+            sample_mean = np.round(np.nanmean(samples, axis=0), 3)
+            sample_max = np.round(np.nanmax(samples, axis=0), 3)
+        sample_last = samples[-1]
+        for gpu_index, gpu in enumerate(self.gpu_list.gpus()):
+            gpu.aggregate = {field: AggregateValue(float(sample_min[gpu_index, field_index]),
+                                                   float(sample_mean[gpu_index, field_index]),
+                                                   float(sample_max[gpu_index, field_index]),
+                                                   float(sample_last[gpu_index, field_index]))
+                             for field_index, field in enumerate(self.fields)}
+        LOGGER.debug('Aggregated %s samples', self.count)
+        self.count = 0
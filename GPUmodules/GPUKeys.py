@@ -36,7 +36,7 @@ from typing import List
 
 class GpuEnum(Enum):
     """ Define Critical dictionary/dataFrame keys and Enum objects. Be careful when modifying. A change
-        in enum value could invalidate saved pickled model parameters.
+        in enum name could invalidate saved discovery caches.
     """
     def __str__(self) -> str:
         return self.name
@@ -32,20 +32,32 @@ __docformat__ = 'reStructuredText'
 
 import re
 import subprocess
+import json
 from shlex import split as shlex_split
 import os
 import sys
 import logging
-from typing import Union, List, Dict, TextIO, IO, Generator, Any, Tuple, Set, Optional
-from pathlib import Path
+import threading
+from time import monotonic
+from types import MappingProxyType
+from typing import Union, List, Dict, TextIO, IO, Generator, Any, Tuple, Set, Optional, Type
 from uuid import uuid4
 from glob import glob
 from datetime import datetime
-from numpy import nan as np_nan
+from platform import release
+from concurrent.futures import ThreadPoolExecutor, Future, wait as futures_wait, FIRST_COMPLETED
+from math import nan, isnan
 
+from GPUmodules import __version__
 from GPUmodules.env import GUT_CONST
 from GPUmodules.GPUKeys import GpuEnum, GpuType, GpuCompatibility, GpuVendor, SensorSet, SensorType, OdMode
 from GPUmodules.RegexPatterns import PatternKeys as PK
+from GPUmodules.SensorReader import SensorFileReader, SensorPlanItem, read_sensor_file, read_sensor_bytes
+from GPUmodules.Sampling import SensorScheduler, AggregateValue, GpuSnapshot
+from GPUmodules.GpuMetrics import parse_gpu_metrics
+from GPUmodules.PciIds import get_pci_ids
+from GPUmodules.NvBackend import NvSmiStream, NvmlBackend, bus_id_key
+from GPUmodules.PlotProtocol import PlotStreamWriter
 
 
 LOGGER = logging.getLogger('gpu-utils')
@@ -109,6 +121,10 @@ class GpuItem:
                                    'fan_pwm', 'sclk_f_val', 'sclk_ps_val', 'mclk_f_val', 'mclk_ps_val', 'ppm']
     short_table_parameters: List[str] = ['model_display', 'power', 'energy', 'temp_val', 'vddgfx_val',
                                          'sclk_f_val', 'sclk_ps_val', 'mclk_f_val', 'mclk_ps_val', 'ppm']
+    # Table parameters with min/mean/max/last values for each display interval when sampling at a high rate.
+    aggregate_fields: List[str] = []
+    _unaggregated_params: Set[str] = {'model_display', 'energy', 'ppm'}
+    aggregate_log_stats: Tuple[str, ...] = ('min', 'max', 'last')
     table_param_labels: Dict[str, str] = {
         'model_display':  'Model',
         'loading':        'GPU Load %',
@@ -126,6 +142,36 @@ class GpuItem:
         'mclk_f_val':     'Mclk (MHz)',
         'mclk_ps_val':    'Mclk Pstate',
         'ppm':            'Perf Mode'}
+    # Sensor parameters each table parameter is derived from.
+    _table_param_sources: Dict[str, Tuple[str, ...]] = {
+        'model_display':  (),
+        'loading':        ('loading', ),
+        'mem_loading':    ('mem_loading', ),
+        'mem_vram_usage': ('mem_vram_used', 'mem_vram_total'),
+        'mem_gtt_usage':  ('mem_gtt_used', 'mem_gtt_total'),
+        'power':          ('power', ),
+        'power_cap':      ('power_cap', ),
+        'energy':         ('power', ),
+        'temp_val':       ('temperatures', ),
+        'vddgfx_val':     ('voltages', ),
+        'fan_pwm':        ('fan_pwm', ),
+        'sclk_f_val':     ('frequencies', 'sclk_ps'),
+        'sclk_ps_val':    ('sclk_ps', ),
+        'mclk_f_val':     ('frequencies', 'mclk_ps'),
+        'mclk_ps_val':    ('mclk_ps', ),
+        'ppm':            ('ppm', )}
+    # Table parameters which use only some sensors of a multi-sensor parameter: (parameter, sensor labels)
+    _table_param_sensor_labels: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+        'temp_val':       ('temperatures', ('edge', 'temp1_input', 'temperature.gpu')),
+        'vddgfx_val':     ('voltages', ('vddgfx', 'in0_input')),
+        'sclk_f_val':     ('frequencies', ('sclk', 'clocks.gr')),
+        'mclk_f_val':     ('frequencies', ('mclk', 'clocks.mem'))}
+    # NV parameters which set other sensor parameters: {NV parameter: parameters set}
+    _nv_param_targets: Dict[str, Tuple[str, ...]] = {'pstates': ('sclk_ps', 'mclk_ps'), 'fan_speed': ('fan_pwm', )}
+    # Monitor values of a runtime suspended device
+    _suspended_values: Dict[str, Any] = {'loading': 0, 'mem_loading': 0, 'power': None, 'temperatures': None,
+                                         'voltages': None, 'frequencies': None, 'fan_pwm': None,
+                                         'sclk_ps': ['', ''], 'mclk_ps': ['', '']}
 
     # Complete GPU print items, use skip lists where appropriate.
     _GPU_CLINFO_Labels: Dict[str, str] = {
@@ -203,7 +249,8 @@ class GpuItem:
         'mclk_f_range':        '   MCLK Range',
         'ppm':                 'Power Profile Mode',
         'power_dpm_state':     'Power DPM State',
-        'power_dpm_force':     'Power DPM Force Performance Level'}
+        'power_dpm_force':     'Power DPM Force Performance Level',
+        'runtime_status':      'Runtime PM Status'}
 
     # Skip list initialization
     _unsupported_skip_list: Set = set(_GPU_Param_Labels) - GPU_NC_Param_List
@@ -242,7 +289,7 @@ class GpuItem:
     vendor_skip_lists[GpuVendor.NVIDIA] = {'fan_enable', 'fan_speed', 'fan_pwm_range', 'fan_speed_range', 'pwm_mode',
                                            'mem_gtt_total', 'mem_gtt_used', 'mem_gtt_usage', 'pp_features',
                                            'mclk_ps', 'mclk_f_range', 'sclk_f_range', 'vddc_range', 'power_dpm_force',
-                                           'temp_crits', 'voltages', 'vddgfx_offset'}
+                                           'temp_crits', 'voltages', 'vddgfx_offset', 'runtime_status'}
 
     # GPU sensor reading details
     sensor_sets = {SensorSet.Static:       {'HWMON':  ['power_cap_range', 'temp_crits',
@@ -429,10 +476,15 @@ class GpuItem:
 
         :param item_id:  UUID of the new item.
         """
-        time_0 = GUT_CONST.now(GUT_CONST.useltz)
         self.validated_sensors: bool = False
-        self.read_time = GUT_CONST.now(GUT_CONST.useltz)
-        self.energy: Dict[str, Any] = {'t0': time_0, 'tn': time_0, 'cumulative': 0.0}
+        # Time stamps of the current poll, set once per poll for all parameters.
+        self.read_mono: float = monotonic()
+        self.read_time: datetime = GUT_CONST.now(GUT_CONST.useltz)
+        self.snapshot: Optional[GpuSnapshot] = None
+        # Held while a parallel read publishes its snapshot or is expired.
+        self.read_lock = threading.Lock()
+        # Energy times are monotonic.
+        self.energy: Dict[str, Any] = {'t0': self.read_mono, 'tn': self.read_mono, 'cumulative': 0.0}
         self.read_skip: tuple = ()    # List of parameters that are to be skipped.
         self.read_disabled: List[str] = []    # List of parameters that failed during read.
         self.write_disabled: List[str] = []   # List of parameters that failed during write.
@@ -499,6 +551,7 @@ class GpuItem:
             'ppm': '',
             'power_dpm_state': '',
             'power_dpm_force': '',
+            'runtime_status': '',
             'vbios': ''})
         self.clinfo: ObjDict = ObjDict({
             'device_name': '',
@@ -525,6 +578,18 @@ class GpuItem:
         self.vddc_curve_range: Dict[int, dict] = {}        # {1: {'SCLK': ['val1', 'val2'], 'VOLT': ['val1', 'val2']}
         self.ppm_modes: Dict[str, List[str]] = {}          # {'1': ['Name', 'Description']}
         self.raw: Dict[str, dict] = {'DEVICE': {}, 'HWMON': {}}
+        self.sensor_reader = SensorFileReader()
+        self.read_plan: Optional[Dict[SensorSet, List[SensorPlanItem]]] = None
+        self.gpu_metrics_path: Optional[str] = None
+        self.gpu_metrics_params: Set[str] = set()
+        self.gpu_metrics_pending: bool = False
+        self.gpu_metrics_disabled: bool = False
+        # Monitor read plan without gpu_metrics, restored if gpu_metrics can not be read.
+        self.gpu_metrics_fallback_plan: List[SensorPlanItem] = []
+        self.runtime_status_path: Optional[str] = None
+        self.field_params: Optional[Dict[str, Optional[Set[str]]]] = None
+        self.sensor_scheduler: Optional[SensorScheduler] = None
+        self.aggregate: Dict[str, AggregateValue] = {}
         self.table_parameters_status: Dict[str, bool] = {}
         for item in self.table_parameters:
             self.table_parameters_status.update({item: True})
@@ -559,6 +624,80 @@ class GpuItem:
                         cls.table_parameters.remove(fan_item)
                     except ValueError: pass
 
+    @classmethod
+    def resolve_fields(cls, fields: List[str]) -> Dict[str, Optional[Set[str]]]:
+        """ Resolve table parameters to the sensor parameters needed to derive them.
+
+        :param fields: List of table parameter names.
+        :return: Dictionary of sensor parameter name to set of sensor labels needed, or None if all are needed.
+        :raises KeyError: If a field is not a valid table parameter.
+        """
+        field_params: Dict[str, Optional[Set[str]]] = {}
+        for field in fields:
+            if field not in cls.table_param_labels:
+                raise KeyError('Invalid field [{}], valid fields: {}'.format(field, ','.join(cls.table_param_labels)))
+            label_param, labels = cls._table_param_sensor_labels.get(field, (None, ()))
+            for param in cls._table_param_sources[field]:
+                if param == label_param:
+                    field_labels = field_params.setdefault(param, set())
+                    if field_labels is not None: field_labels.update(labels)
+                else:
+                    field_params[param] = None
+        return field_params
+
+    @classmethod
+    def set_table_fields(cls, fields: List[str]) -> None:
+        """ Limit table parameters to the given fields, in the given order.
+
+        :param fields: List of table parameter names.
+        """
+        field_labels = {field: cls.table_param_labels[field] for field in fields if field in cls.table_param_labels}
+        cls.table_param_labels.clear()
+        cls.table_param_labels.update(field_labels)
+        cls.table_parameters[:] = list(field_labels)
+        cls.short_table_parameters[:] = [field for field in cls.short_table_parameters if field in field_labels]
+
+    @classmethod
+    def set_aggregate_fields(cls) -> List[str]:
+        """ Set the table parameters which are aggregated for each display interval.
+
+        :return: List of aggregated table parameter names.
+        """
+        cls.aggregate_fields[:] = [item for item in cls.table_parameters if item not in cls._unaggregated_params]
+        return cls.aggregate_fields
+
+    def get_aggregate_value(self, name: str, stat: str = 'mean') -> Any:
+        """ Get the given statistic of a table parameter for the last display interval.  The current
+            value is returned for parameters that are not aggregated.
+
+        :param name: Table parameter name
+        :param stat: Statistic name: min, mean, max, or last
+        :return: Parameter value
+        """
+        if name in self.aggregate: return getattr(self.aggregate[name], stat)
+        return self.get_snapshot_value(name)
+
+    def get_table_value(self, name: str) -> Union[str, int, float]:
+        """ Get the formatted value of a table parameter for display.  Aggregated values are
+            shown as mean [min-max].
+
+        :param name: Table parameter name
+        :return: Formatted value
+        """
+        if name in self.aggregate and not isnan(self.aggregate[name].mean):
+            value = self.aggregate[name]
+            return '{:.4g} [{:.4g}-{:.4g}]'.format(value.mean, value.min, value.max)
+        return format_table_value(self.get_snapshot_value(name), name, self.is_suspended())
+
+    def set_field_params(self, field_params: Optional[Dict[str, Optional[Set[str]]]]) -> None:
+        """ Set the sensor parameters read for the Monitor sensor set.  The read plan is recompiled
+            on the next read.
+
+        :param field_params: Dictionary from resolve_fields, or None to read all Monitor parameters.
+        """
+        self.field_params = field_params
+        self.read_plan = None
+
     @classmethod
     def is_apu(cls, name: str) -> bool:
         """ Check if given GPU name is an APU.
@@ -589,7 +728,6 @@ class GpuItem:
         :param name:  Parameter name
         :param value:  parameter value
         """
-        self.read_time = GUT_CONST.now(GUT_CONST.useltz)
         LOGGER.debug('Set param value: [%s], type: [%s]', value, type(value))
         if isinstance(value, tuple):
             self.prm[name] = list(value)
@@ -603,10 +741,9 @@ class GpuItem:
             self.prm[name] = re.sub(PATTERNS[PK.PPM_NOTCHK], '-', self.prm[name])
         elif name == 'power':
             if isinstance(value, (int, float)):
-                time_n = GUT_CONST.now(GUT_CONST.useltz)
                 self.prm[name] = value
-                delta_hrs = ((time_n - self.energy['tn']).total_seconds()) / 3600
-                self.energy['tn'] = time_n
+                delta_hrs = (self.read_mono - self.energy['tn']) / 3600
+                self.energy['tn'] = self.read_mono
                 self.energy['cumulative'] += delta_hrs * value / 1000
                 self.prm['energy'] = round(self.energy['cumulative'], 6)
             else:
@@ -720,8 +857,6 @@ class GpuItem:
         :return: Parameter value
         """
         if name == 'read_time':
-            if self.param_is_active('energy') and self.param_is_active('power'):
-                return self.energy['tn']
             return self.read_time
         # Parameters with '_val' as a suffix are derived from a direct source.
         if re.fullmatch(PATTERNS[PK.VAL_ITEM], name):
@@ -739,7 +874,7 @@ class GpuItem:
                 return None
             if name == 'vddgfx_val':
                 if not self.prm['voltages']:
-                    return np_nan
+                    return nan
                 if 'vddgfx' in self.prm['voltages']:
                     if isinstance(self.prm['voltages']['vddgfx'], str):
                         return int(self.prm['voltages']['vddgfx'])
@@ -815,38 +950,12 @@ class GpuItem:
             message = 'Error: Can not access system pci.ids file [{}]'.format(GUT_CONST.sys_pciid)
             GUT_CONST.process_message(message, log_flag=True)
             return ''
-        with open(GUT_CONST.sys_pciid, 'r', encoding='utf8') as pci_id_file_ptr:
-            model_str = ''
-            level = 0
-            for line_item in pci_id_file_ptr:
-                line = line_item.rstrip()
-                if len(line) < 4:
-                    continue
-                if line[0] == '#':
-                    continue
-                if level == 0:
-                    if re.fullmatch(PATTERNS[PK.PCIIID_L0], line):
-                        if line[:4] == self.prm.id['vendor'].replace('0x', ''):
-                            level += 1
-                            continue
-                elif level == 1:
-                    if re.fullmatch(PATTERNS[PK.PCIIID_L0], line):
-                        break
-                    if re.fullmatch(PATTERNS[PK.PCIIID_L1], line):
-                        if line[1:5] == self.prm.id['device'].replace('0x', ''):
-                            model_str = line[5:]
-                            level += 1
-                            continue
-                elif level == 2:
-                    if re.fullmatch(PATTERNS[PK.PCIIID_L0], line):
-                        break
-                    if re.fullmatch(PATTERNS[PK.PCIIID_L1], line):
-                        break
-                    if re.fullmatch(PATTERNS[PK.PCIIID_L2], line):
-                        if line[2:6] == self.prm.id['subsystem_vendor'].replace('0x', ''):
-                            if line[7:11] == self.prm.id['subsystem_device'].replace('0x', ''):
-                                model_str = line[11:]
-                                break
+        pci_ids = get_pci_ids(GUT_CONST.sys_pciid, GUT_CONST.cache_dir)
+        if not pci_ids: return ''
+        model_str = pci_ids.subsystem_name(self.prm.id['vendor'], self.prm.id['device'],
+                                           self.prm.id['subsystem_vendor'], self.prm.id['subsystem_device'])
+        if not model_str:
+            model_str = pci_ids.device_name(self.prm.id['vendor'], self.prm.id['device'])
         return model_str.strip()
 
     def populate_prm_from_dict(self, params: Dict[str, any]) -> None:
@@ -1501,22 +1610,344 @@ class GpuItem:
             return values[0]
         raise ValueError('Invalid sensor type: {}'.format(target_sensor['type']))
 
-    def read_gpu_sensor_set(self, data_type: SensorSet = SensorSet.All) -> bool:
+    def compile_read_plan(self) -> None:
+        """ Compile the read plan for each sensor set.  Sensor file paths are resolved, static labels
+            read, and conversion factors and parsers selected once, so polling only requires reads
+            and arithmetic.  Skipped and disabled parameters and those with missing files are excluded.
+        """
+        self.read_plan = {data_type: [] for data_type in self.sensor_sets}
+        if self.prm.vendor != GpuVendor.AMD:
+            return
+        if not GUT_CONST.force_all:
+            if self.prm.gpu_type == GpuType.Unsupported or not self.prm.readable:
+                return
+        plan_items: Dict[Tuple[str, str], Optional[SensorPlanItem]] = {}
+        for data_type, param_list in self.sensor_sets.items():
+            for sensor_type, param_names in param_list.items():
+                for param in param_names:
+                    if (sensor_type, param) not in plan_items:
+                        plan_items[(sensor_type, param)] = self.compile_plan_item(param, sensor_type)
+                    if plan_items[(sensor_type, param)]:
+                        self.read_plan[data_type].append(plan_items[(sensor_type, param)])
+        if self.field_params is not None:
+            self.read_plan[SensorSet.Monitor] = [self.compile_field_plan_item(plan_item)
+                                                 for plan_item in plan_items.values()
+                                                 if plan_item and plan_item.param in self.field_params]
+        device_sensor_path = self.prm.card_path if self.prm.card_path else self.prm.sys_card_path
+        if device_sensor_path:
+            runtime_status_path = os.path.join(device_sensor_path, 'power', 'runtime_status')
+            self.runtime_status_path = runtime_status_path if os.path.isfile(runtime_status_path) else None
+        if self.read_runtime_status() == 'suspended':
+            # Reading gpu_metrics would resume the device, so it is checked on the first active read.
+            self.gpu_metrics_path = None
+            self.gpu_metrics_params = set()
+            self.gpu_metrics_pending = True
+        else:
+            self.compile_gpu_metrics()
+        LOGGER.debug('Read plan for card%s:\n%s', self.prm.card_num, self.read_plan)
+
+    def compile_field_plan_item(self, plan_item: SensorPlanItem) -> SensorPlanItem:
+        """ Limit the sensor files of the given plan item to those with labels needed by the fields.
+
+        :param plan_item: Compiled plan item for a parameter in field_params.
+        :return: The plan item, or a new plan item for the needed sensor files.
+        """
+        labels = self.field_params[plan_item.param]
+        if not labels or plan_item.param_type != SensorType.InputLabelX or not plan_item.files:
+            return plan_item
+        file_indexes = [index for index, label in enumerate(plan_item.labels) if label in labels] or [0]
+        return SensorPlanItem(plan_item.param, plan_item.param_type,
+                              tuple(plan_item.files[index] for index in file_indexes),
+                              tuple(plan_item.labels[index] for index in file_indexes),
+                              plan_item.cf, plan_item.parser)
+
+    def compile_gpu_metrics(self) -> None:
+        """ Use the gpu_metrics driver file, if available in a supported format, to read Monitor
+            parameters with a single read.  Parameters provided by gpu_metrics are removed from the
+            Monitor read plan.  The device must not be runtime suspended.  Not used once disabled by a
+            failed read.
+        """
+        self.gpu_metrics_path = None
+        self.gpu_metrics_params = set()
+        self.gpu_metrics_fallback_plan = []
+        self.gpu_metrics_pending = False
+        if self.gpu_metrics_disabled: return
+        device_sensor_path = self.prm.card_path if self.prm.card_path else self.prm.sys_card_path
+        if not device_sensor_path: return
+        metrics_path = os.path.join(device_sensor_path, 'gpu_metrics')
+        if not os.path.isfile(metrics_path): return
+        try:
+            values = parse_gpu_metrics(read_sensor_bytes(metrics_path))
+        except OSError as except_err:
+            LOGGER.debug('Can not read gpu_metrics [%s]: %s', metrics_path, except_err)
+            return
+        if not values: return
+        monitor_params = {plan_item.param for plan_item in self.read_plan[SensorSet.Monitor]}
+        self.gpu_metrics_params = {param for param, value in values.items()
+                                   if value is not None and param in monitor_params}
+        if not self.gpu_metrics_params: return
+        self.gpu_metrics_path = metrics_path
+        self.gpu_metrics_fallback_plan = self.read_plan[SensorSet.Monitor]
+        self.read_plan[SensorSet.Monitor] = [plan_item for plan_item in self.read_plan[SensorSet.Monitor]
+                                             if plan_item.param not in self.gpu_metrics_params]
+        LOGGER.debug('Using gpu_metrics for card%s: %s', self.prm.card_num, self.gpu_metrics_params)
+
+    def read_gpu_metrics(self) -> bool:
+        """ Read the gpu_metrics driver file and set the parameter values it provides.  On failure,
+            gpu_metrics is disabled and the Monitor read plan without gpu_metrics is restored.
+
+        :return: True if successful
+        """
+        try:
+            values = parse_gpu_metrics(self.sensor_reader.read_bytes(self.gpu_metrics_path))
+        except OSError as except_err:
+            LOGGER.debug('Can not read gpu_metrics [%s]: %s', self.gpu_metrics_path, except_err)
+            values = None
+        if not values:
+            LOGGER.debug('Disabling gpu_metrics for card%s', self.prm.card_num)
+            self.read_plan[SensorSet.Monitor] = self.gpu_metrics_fallback_plan
+            self.gpu_metrics_disabled = True
+            self.compile_gpu_metrics()
+            return False
+        for param in self.gpu_metrics_params:
+            if values[param] is not None and self.param_is_active(param):
+                self.set_params_value(param, values[param])
+        return True
+
+    def read_runtime_status(self) -> str:
+        """ Read the runtime power management status of the device.  Reading the status does not
+            resume a suspended device.
+
+        :return: The status, such as active or suspended, or empty string if not available.
+        """
+        if not self.runtime_status_path: return ''
+        try:
+            self.prm.runtime_status = self.sensor_reader.readline(self.runtime_status_path).strip()
+        except OSError as except_err:
+            LOGGER.debug('Can not read runtime status [%s]: %s', self.runtime_status_path, except_err)
+            self.runtime_status_path = None
+            self.prm.runtime_status = ''
+        return self.prm.runtime_status
+
+    def is_suspended(self) -> bool:
+        """ Check if the device was runtime suspended at the last read.
+
+        :return: True if suspended
+        """
+        return self.prm.runtime_status == 'suspended'
+
+    def set_suspended_values(self) -> None:
+        """ Set Monitor values for a suspended device without reading sensors, which would resume it.
+            An idle device has no loading and the other dynamic values are not available.
+        """
+        for param, value in self._suspended_values.items():
+            if self.param_is_active(param):
+                self.prm[param] = value.copy() if isinstance(value, list) else value
+        # Suspended time does not contribute to energy.
+        self.energy['tn'] = self.read_mono
+
+    def compile_plan_item(self, parameter: str, sensor_type: str = 'HWMON') -> Optional[SensorPlanItem]:
+        """ Resolve the details needed to read the given parameter.
+
+        :param parameter: GpuItem parameter name (AMD)
+        :param sensor_type: GPU sensor name (HWMON or DEVICE)
+        :return: The plan item or None if the parameter can not be read.
+        """
+        sensor_dict = self._sensor_details[self.prm.vendor].get(sensor_type, {})
+        if parameter not in sensor_dict:
+            GUT_CONST.process_message('Error: Invalid parameter [{}]'.format(parameter))
+            return None
+        if not self.param_is_active(parameter):
+            return None
+        parsers = {SensorType.SingleParam: self._parse_single_param,
+                   SensorType.SingleString: self._parse_single_string,
+                   SensorType.SingleStringSelect: self._parse_string_select,
+                   SensorType.MinMax: self._parse_min_max,
+                   SensorType.MLSS: self._parse_multi_line,
+                   SensorType.MLMS: self._parse_multi_file,
+                   SensorType.InputLabel: self._parse_input_label,
+                   SensorType.InputLabelX: self._parse_input_label_x,
+                   SensorType.AllPStates: self._parse_all_pstates}
+
+        device_sensor_path = self.prm.card_path if self.prm.card_path else self.prm.sys_card_path
+        sensor_path = self.prm.hwmon_path if sensor_type == 'HWMON' else device_sensor_path
+        target_sensor = sensor_dict[parameter]
+        if target_sensor['type'] in (SensorType.InputLabelX, SensorType.AllPStates):
+            sensor_files = tuple(sorted(glob(os.path.join(sensor_path, target_sensor['sensor'][0])))) \
+                           if sensor_path else ()
+        else:
+            sensor_files = tuple(os.path.join(sensor_path, sensor_file) for sensor_file in target_sensor['sensor'])
+        for file_path in sensor_files:
+            if not sensor_path or not os.path.isfile(file_path):
+                LOGGER.debug('HW file does not exist: %s', file_path)
+                self.disable_param_read(parameter)
+                if parameter != 'unique_id':
+                    self.disable_param_read('unique_id')
+                return None
+        labels = ()
+        if target_sensor['type'] == SensorType.InputLabelX:
+            labels = tuple(self.read_sensor_label(file_path) for file_path in sensor_files)
+        return SensorPlanItem(parameter, target_sensor['type'], sensor_files, labels,
+                              target_sensor['cf'], parsers[target_sensor['type']])
+
+    @staticmethod
+    def read_sensor_label(file_path: str) -> str:
+        """ Read the label associated with the given input or crit sensor file.
+
+        :param file_path: Full path of the sensor file.
+        :return: Label read from the label file or the sensor file name if not available.
+        """
+        file_name = os.path.basename(file_path)
+        label_file_path: str = ''
+        if '_input' in file_name:
+            label_file_path = os.path.join(os.path.dirname(file_path), file_name.replace('_input', '_label'))
+        elif '_crit' in file_name:
+            label_file_path = os.path.join(os.path.dirname(file_path), file_name.replace('_crit', '_label'))
+        else:
+            GUT_CONST.process_message('Error in sensor label pair: {}'.format(file_path))
+        if label_file_path and os.path.isfile(label_file_path):
+            try:
+                return read_sensor_file(label_file_path).split('\n', 1)[0].strip()
+            except OSError as except_err:
+                LOGGER.debug('Can not read label file [%s]: %s', label_file_path, except_err)
+        return file_name
+
+    def read_plan_item(self, plan_item: SensorPlanItem,
+                       persistent: bool = False) -> Union[None, bool, int, str, tuple, list, dict]:
+        """ Read the sensor files of the given plan item and return the parsed value.
+
+        :param plan_item: Compiled plan item for the target parameter.
+        :param persistent: Use the persistent sensor reader instead of open/read/close if True
+        :return: Value from reading sensor, None if invalid, or False if read failed.
+        """
+        read_file = self.sensor_reader.read if persistent else read_sensor_file
+        try:
+            contents = [read_file(file_path) for file_path in plan_item.files]
+        except PermissionError as except_err:
+            LOGGER.debug('Error: Can not read GPU [%s] driver file [%s], error: [%s]',
+                         self.prm.pcie_id, plan_item.files, except_err)
+            print('Error: System support issue for GPU [{}]'.format(self.prm.pcie_id))
+            self.disable_param_read(plan_item.param)
+            return None
+        except OSError as except_err:
+            LOGGER.debug('Exception [%s]: Can not read HW file: %s', except_err, plan_item.files)
+            self.disable_param_read(plan_item.param)
+            return False
+        return plan_item.parser(plan_item, contents)
+
+    @staticmethod
+    def _first_line(content: str) -> str:
+        return content.split('\n', 1)[0].strip()
+
+    def _parse_single_param(self, plan_item: SensorPlanItem, contents: List[str]) -> Union[int, float]:
+        value = int(self._first_line(contents[0]))
+        return value if plan_item.cf == 1 else value * plan_item.cf
+
+    def _parse_single_string(self, _plan_item: SensorPlanItem, contents: List[str]) -> str:
+        return self._first_line(contents[0])
+
+    @staticmethod
+    def _parse_string_select(_plan_item: SensorPlanItem, contents: List[str]) -> Optional[str]:
+        for content in contents:
+            for line in content.splitlines():
+                if '*' in line:
+                    return line.strip()
+        return None
+
+    def _parse_min_max(self, plan_item: SensorPlanItem, contents: List[str]) -> Tuple[int, int]:
+        return (int(int(self._first_line(contents[0])) * plan_item.cf),
+                int(int(self._first_line(contents[1])) * plan_item.cf))
+
+    @staticmethod
+    def _parse_multi_line(_plan_item: SensorPlanItem, contents: List[str]) -> List[str]:
+        return [line.strip() for content in contents for line in content.splitlines()]
+
+    def _parse_multi_file(self, _plan_item: SensorPlanItem, contents: List[str]) -> List[str]:
+        return [self._first_line(content) for content in contents]
+
+    def _parse_input_label(self, plan_item: SensorPlanItem, contents: List[str]) -> Tuple[float, str]:
+        return int(self._first_line(contents[0])) * plan_item.cf, self._first_line(contents[1])
+
+    def _parse_input_label_x(self, plan_item: SensorPlanItem, contents: List[str]) -> Dict[str, float]:
+        return {label: int(self._first_line(content)) * plan_item.cf
+                for label, content in zip(plan_item.labels, contents)}
+
+    def _parse_all_pstates(self, plan_item: SensorPlanItem, contents: List[str]) -> None:
+        # Updates self.all_pstates in place: clock_name: {ps_num: {'value': ps_val, 'state': ps_sts}}
+        for file_path, content in zip(plan_item.files, contents):
+            clock_name = re.sub(r'.*pp_dpm_', '', file_path)
+            if clock_name not in self.all_pstates:
+                self.all_pstates.update({clock_name: {}})
+            for ps_value in content.splitlines():
+                ps_val_list = re.sub(':', '', ps_value.strip()).split()
+                if len(ps_val_list) > 1:
+                    ps_num = int(ps_val_list[0]) if ps_val_list[0].isnumeric() else ps_val_list[0]
+                    ps_sts = len(ps_val_list) > 2
+                    if ps_num not in self.all_pstates[clock_name]:
+                        self.all_pstates[clock_name].update({ps_num: {'value': ps_val_list[1], 'state': ps_sts}})
+                    else:
+                        self.all_pstates[clock_name][ps_num]['value'] = ps_val_list[1]
+                        self.all_pstates[clock_name][ps_num]['state'] = ps_sts
+
+    def read_gpu_sensor_set(self, data_type: SensorSet = SensorSet.All,
+                            read_time: Optional[Tuple[float, datetime]] = None,
+                            expired: Optional[threading.Event] = None) -> bool:
         """ Read GPU sensor data from HWMON and DEVICE sensors using the sensor set defined
-            by data_type.
+            by data_type.  A new snapshot is set after the read, unless the read has expired.
 
         :param data_type: Specifies the sensor set: Dynamic, Static, Info, State, All Monitor
+        :param read_time: Monotonic and wall clock time stamps of the poll.  Current time if None.
+        :param expired: Set by the caller when a parallel read exceeds its budget.  An expired read
+            does not set a snapshot, so the previous snapshot is kept.  The values it reads are still
+            set in prm, and energy and the sensor scheduler are updated, as the read completes.
         :return: True on success.
         """
+        start_time = monotonic()
+        self.set_read_time(read_time if read_time else (start_time, GUT_CONST.now(GUT_CONST.useltz)))
         if self.prm.vendor == GpuVendor.AMD:
             return_stat = self.read_gpu_sensor_set_amd(data_type)
-            self.update_table_items_status()
-            return return_stat
-        if self.prm.vendor == GpuVendor.NVIDIA:
+        elif self.prm.vendor == GpuVendor.NVIDIA:
             return_stat = self.read_gpu_sensor_set_nv(data_type)
+        else:
+            return False
+        with self.read_lock:
+            if expired and expired.is_set():
+                LOGGER.debug('Snapshot of late read of card%s discarded after %.3fs', self.prm.card_num, monotonic() - start_time)
+                return False
             self.update_table_items_status()
-            return return_stat
-        return False
+            self.take_snapshot(monotonic() - start_time)
+        return return_stat
+
+    def set_read_time(self, read_time: Tuple[float, datetime]) -> None:
+        """ Set the time stamps used for all parameters read in the current poll.
+
+        :param read_time: Monotonic and wall clock time stamps of the poll.
+        """
+        self.read_mono, self.read_time = read_time
+
+    def take_snapshot(self, read_duration: float) -> GpuSnapshot:
+        """ Set a new snapshot of the table parameter values of the current poll.
+
+        :param read_duration: Seconds taken to read the GPU.
+        :return: The new snapshot
+        """
+        self.snapshot = GpuSnapshot(self.prm.card_num, self.read_mono, self.read_time, read_duration,
+                                    MappingProxyType({item: self.get_params_value(item)
+                                                      for item in self.table_parameters}))
+        return self.snapshot
+
+    def get_snapshot_value(self, name: str) -> Any:
+        """ Get the value of a table parameter, or read_time, from the last snapshot.  The current
+            value is returned if the parameter is not in the snapshot.
+
+        :param name: Table parameter name or read_time
+        :return: Parameter value
+        """
+        snapshot = self.snapshot
+        if snapshot:
+            if name == 'read_time': return snapshot.wall_time
+            if name in snapshot.values: return snapshot.values[name]
+        return self.get_params_value(name)
 
     def update_table_items_status(self) -> None:
         """ Update the readable status of table related parameters.
@@ -1527,7 +1958,7 @@ class GpuItem:
         for table_item, status in self.table_parameters_status.items():
             if GUT_CONST.debug:
                 print('{}: {}: {}'.format(table_item, status, self.get_params_value(table_item)))
-            if format_table_value(self.get_params_value(table_item), table_item) in {None, '', np_nan, '---'}:
+            if format_table_value(self.get_params_value(table_item), table_item) in {None, '', nan, '---'}:
                 self.table_parameters_status[table_item] = False
         if GUT_CONST.debug:
             print('')
@@ -1541,10 +1972,8 @@ class GpuItem:
         if data_type not in self.nv_query_items:
             raise TypeError('Invalid SensorSet value: [{}]'.format(data_type))
 
-        sensor_dict = GpuItem.nv_query_items[data_type]
         nsmi_items = []
-        query_list = [item for sublist in sensor_dict.values() for item in sublist]
-        query_list = [item for item in query_list if not self.param_is_active(item)]
+        query_list = self.get_nv_query_list(data_type)
 
         if self.validated_sensors:
             qry_string = ','.join(query_list)
@@ -1574,7 +2003,53 @@ class GpuItem:
                 self.prm.readable = False
                 return False
 
-        results = dict(zip(query_list, nsmi_items))
+        self.set_nv_query_results(data_type, dict(zip(query_list, nsmi_items)))
+        return True
+
+    def get_nv_sensor_dict(self, data_type: SensorSet = SensorSet.All) -> Dict[str, Tuple[str, ...]]:
+        """ Get the nvidia-smi query fields of each parameter in the given sensor set.  If field
+            params are set, the Monitor set includes only the query fields they need, from any set.
+
+        :param data_type: specifies the set of sensors to read
+        :return: Dictionary of parameter name to tuple of nvidia-smi query field names
+        """
+        if data_type != SensorSet.Monitor or self.field_params is None:
+            return GpuItem.nv_query_items[data_type]
+        sensor_dict: Dict[str, Tuple[str, ...]] = {}
+        for set_sensor_dict in GpuItem.nv_query_items.values():
+            for param_name, sensor_list in set_sensor_dict.items():
+                if param_name in sensor_dict: continue
+                if param_name in self._nv_param_targets:
+                    if not any(target in self.field_params for target in self._nv_param_targets[param_name]): continue
+                    labels = None
+                elif param_name in self.field_params:
+                    labels = self.field_params[param_name]
+                else:
+                    continue
+                if labels:
+                    sensor_list = tuple(sn_k for sn_k in sensor_list if sn_k in labels) or sensor_list[:1]
+                sensor_dict[param_name] = sensor_list
+        return sensor_dict
+
+    def get_nv_query_list(self, data_type: SensorSet = SensorSet.All) -> List[str]:
+        """ Get the list of active nvidia-smi query fields for the given sensor set.
+
+        :param data_type: specifies the set of sensors to read
+        :return: List of nvidia-smi query field names
+        """
+        sensor_dict = self.get_nv_sensor_dict(data_type)
+        query_list = [item for sublist in sensor_dict.values() for item in sublist]
+        return [item for item in query_list if self.param_is_active(item)]
+
+    def set_nv_query_results(self, data_type: SensorSet, query_results: Dict[str, Any]) -> None:
+        """ Populate GpuItem data from the results of an nvidia-smi query.
+
+        :param data_type: specifies the set of sensors that were read
+        :param query_results: Dictionary of query field name to result string
+        """
+        sensor_dict = self.get_nv_sensor_dict(data_type)
+        results: Dict[str, str] = {item: '' for sublist in sensor_dict.values() for item in sublist}
+        results.update({item: value for item, value in query_results.items() if isinstance(value, str)})
         LOGGER.debug('NV query result: %s', results)
 
         # Populate GpuItem data from results dictionary
@@ -1614,8 +2089,8 @@ class GpuItem:
             elif re.fullmatch(PATTERNS[PK.GPUMEMTYPE], param_name):
                 for sn_k in sensor_list:
                     if sn_k not in results: continue
-                    mem_value = int(results[sn_k]) if results[sn_k].isnumeric else None
-                    self.prm[param_name] = mem_value / 1024.0
+                    mem_value = int(results[sn_k]) if results[sn_k].isnumeric() else None
+                    self.prm[param_name] = mem_value / 1024.0 if mem_value is not None else None
                 self.set_memory_usage()
             elif param_name == 'fan_speed':
                 sn_k = sensor_list[0]
@@ -1637,7 +2112,38 @@ class GpuItem:
                 elif not results[sn_k]:
                     self.prm[param_name] = None
                 self.prm[param_name] = results[sn_k]
-        return True
+
+    def set_nv_sensor_values(self, values: Dict[str, Union[int, float, None]]) -> None:
+        """ Populate GpuItem Monitor data from numeric values keyed by nvidia-smi query field name, as
+            returned by the NVML backend.  Fields not in values are left unchanged.
+
+        :param values: Dictionary of query field name to value in nvidia-smi units
+        """
+        for param_name, sensor_list in GpuItem.nv_query_items[SensorSet.Monitor].items():
+            if not any(sn_k in values for sn_k in sensor_list): continue
+            if param_name == 'power':
+                if values['power.draw'] is None:
+                    self.disable_param_read('power')
+                    self.disable_param_read('energy')
+                else:
+                    self.set_params_value('power', values['power.draw'])
+            elif param_name == 'pstates':
+                # NVML returns 32 for an unknown p-state
+                pstate = values['pstate'] if values['pstate'] is not None and values['pstate'] < 16 else None
+                self.prm['sclk_ps'][0] = pstate
+                self.prm['mclk_ps'][0] = pstate
+            elif param_name in {'temperatures', 'frequencies'}:
+                self.prm[param_name] = {sn_k: values[sn_k] for sn_k in sensor_list if sn_k in values}
+            elif param_name == 'mem_vram_used':
+                mem_value = values[sensor_list[0]]
+                self.prm[param_name] = mem_value / 1024.0 if mem_value is not None else None
+                self.set_memory_usage()
+            elif param_name == 'fan_speed':
+                if values[sensor_list[0]] is not None:
+                    self.prm[param_name] = values[sensor_list[0]]
+                    self.prm.fan_pwm = self.prm[param_name]
+            else:
+                self.prm[param_name] = values[sensor_list[0]]
 
     def read_gpu_sensor_set_amd(self, data_type: SensorSet = SensorSet.All) -> bool:
         """ Read GPU sensor data from HWMON and DEVICE sensors using the sensor set defined
@@ -1651,21 +2157,42 @@ class GpuItem:
                 return False
 
         return_status = False
-        param_list = self.sensor_sets[data_type]
-
-        for sensor_type, param_names in param_list.items():
-            for param in param_names:
-                LOGGER.debug('Processing parameter: %s', param)
-                rdata = self.read_gpu_sensor(param, vendor=self.prm.vendor, sensor_type=sensor_type)
-                if rdata is False:
-                    if param != 'unique_id':
-                        self.disable_param_read('unique_id')
-                elif rdata is None:
-                    LOGGER.debug('Read data [%s], Invalid or disabled parameter: %s', rdata, param)
-                else:
-                    LOGGER.debug('Valid data [%s] for parameter: %s', rdata, param)
-                    self.set_params_value(param, rdata)
-                    return_status = True
+        if self.read_plan is None:
+            self.compile_read_plan()
+        persistent = data_type == SensorSet.Monitor
+        if persistent and self.read_runtime_status() == 'suspended':
+            LOGGER.debug('card%s is suspended, skipping sensor reads', self.prm.card_num)
+            self.set_suspended_values()
+            return True
+        if persistent and self.gpu_metrics_pending:
+            self.compile_gpu_metrics()
+        if persistent and self.gpu_metrics_path:
+            return_status = self.read_gpu_metrics()
+        scheduler = None
+        if persistent and GUT_CONST.adaptive:
+            if not self.sensor_scheduler:
+                self.sensor_scheduler = SensorScheduler(adaptive=True)
+            scheduler = self.sensor_scheduler
+            scheduler.next_tick()
+
+        for plan_item in self.read_plan[data_type]:
+            param = plan_item.param
+            if not self.param_is_active(param):
+                continue
+            if scheduler and not scheduler.is_due(param):
+                continue
+            LOGGER.debug('Processing parameter: %s', param)
+            rdata = self.read_plan_item(plan_item, persistent=persistent)
+            if rdata is False:
+                if param != 'unique_id':
+                    self.disable_param_read('unique_id')
+            elif rdata is None:
+                LOGGER.debug('Read data [%s], Invalid or disabled parameter: %s', rdata, param)
+            else:
+                LOGGER.debug('Valid data [%s] for parameter: %s', rdata, param)
+                self.set_params_value(param, rdata)
+                if scheduler: scheduler.update(param, rdata)
+                return_status = True
         return return_status
 
     def print_disabled_params(self) -> None:
@@ -1924,25 +2451,44 @@ class GpuItem:
 
         :return: Dictionary of GPU state info for plot data.
         """
-        gpu_state = {'Time': str(self.get_params_value('read_time').strftime(GUT_CONST.TIME_FORMAT)),
+        gpu_state = {'Time': str(self.get_snapshot_value('read_time').strftime(GUT_CONST.TIME_FORMAT)),
                      'Card#': int(self.prm.card_num)}
 
         for table_item in self.table_parameters:
-            gpu_state[table_item] = format_table_value(self.get_params_value(table_item), table_item)
+            gpu_state[table_item] = format_table_value(self.get_snapshot_value(table_item), table_item)
         return gpu_state
 
 
 class GpuList:
     """ A list of GpuItem indexed with uuid.  It also contains a table of parameters used for status reporting.
     """
+    _pci_vendor_names: Dict[str, str] = {'1002': 'Advanced Micro Devices, Inc. [AMD/ATI]',
+                                         '10de': 'NVIDIA Corporation',
+                                         '8086': 'Intel Corporation',
+                                         '1a03': 'ASPEED Technology, Inc.',
+                                         '102b': 'Matrox Electronics Systems Ltd.'}
+
+    discovery_cache_file: str = 'discovery.json'
+    # Enum parameters of GpuItem.prm, saved to the discovery cache by name.
+    _cache_enum_params: Dict[str, Type[GpuEnum]] = {'vendor': GpuVendor, 'gpu_type': GpuType}
+    opencl_cache_file: str = 'opencl.json'
+    _ocl_driver_modules: Tuple[str, ...] = ('amdgpu', 'nvidia', 'i915')
+    _ocl_icd_dir: str = '/etc/OpenCL/vendors'
+
     def __init__(self) -> None:
         self.list: Dict[str, GpuItem] = {}
         self.opencl_map: dict = {}
+        self.opencl_thread: Optional[threading.Thread] = None
         self.amd_featuremask: Optional[int] = None
         self.current_amd_featuremask: Union[str, int, None] = None
         self.amd_wattman: bool = False
         self.amd_writable: bool = False
         self.nv_readwritable: bool = False
+        self.read_executor: Optional[ThreadPoolExecutor] = None
+        self.pending_reads: Dict[str, Future] = {}
+        self.nv_stream: Optional[NvSmiStream] = None
+        self.nvml: Optional[NvmlBackend] = None
+        self.plot_writer: Optional[PlotStreamWriter] = None
 
     def __repr__(self) -> str:
         return str(self.list)
@@ -2052,17 +2598,96 @@ class GpuList:
                 if pciid: pci_list.append(pciid.group(0))
         return pci_list
 
+    @staticmethod
+    def read_pciid_names(pci_details: Dict[str, Dict[str, str]]) -> None:
+        """ Set vendor, device, and subsystem names for each device in pci_details from the system
+            pci.ids file.
+
+        :param pci_details: Dictionary of pcie_id to pci details read from sysfs.
+        """
+        if not GUT_CONST.sys_pciid or not os.path.isfile(GUT_CONST.sys_pciid):
+            LOGGER.debug('Can not access system pci.ids file [%s]', GUT_CONST.sys_pciid)
+            return
+        pci_ids = get_pci_ids(GUT_CONST.sys_pciid, GUT_CONST.cache_dir)
+        if not pci_ids: return
+        for details in pci_details.values():
+            for name_key, name in (('vendor_name', pci_ids.vendor_name(details['vendor'])),
+                                   ('device_name', pci_ids.device_name(details['vendor'], details['device'])),
+                                   ('subsystem_name', pci_ids.subsystem_name(details['vendor'], details['device'],
+                                                                             details['subsystem_vendor'],
+                                                                             details['subsystem_device']))):
+                if name: details[name_key] = name
+
+    @classmethod
+    def read_pci_sysfs(cls) -> Optional[Dict[str, Dict[str, str]]]:
+        """ Read the pci details of all display controllers from sysfs.
+
+        :return: Dictionary of pcie_id to pci details, or None if sysfs pci details are not available.
+        """
+        if not os.path.isdir(GUT_CONST.pci_root):
+            LOGGER.debug('PCI sysfs path [%s] not found', GUT_CONST.pci_root)
+            return None
+        pci_details: Dict[str, Dict[str, str]] = {}
+        for pci_address in sorted(os.listdir(GUT_CONST.pci_root)):
+            device_path = os.path.join(GUT_CONST.pci_root, pci_address)
+            try:
+                pci_class = int(read_sensor_file(os.path.join(device_path, 'class')).strip(), 16)
+            except (OSError, ValueError):
+                continue
+            # Display controller class, excluding Non-VGA unclassified devices
+            if pci_class >> 16 != 0x03:
+                continue
+            details = {'class': '0x{:06x}'.format(pci_class)}
+            for pci_item in ('vendor', 'device', 'subsystem_vendor', 'subsystem_device', 'revision'):
+                try:
+                    details[pci_item] = read_sensor_file(os.path.join(device_path, pci_item)).strip().lower()
+                except OSError:
+                    details[pci_item] = ''
+                details[pci_item] = details[pci_item].replace('0x', '')
+            driver_path = os.path.join(device_path, 'driver')
+            details['driver'] = os.path.basename(os.readlink(driver_path)) if os.path.islink(driver_path) else 'UNKNOWN'
+            pcie_id = pci_address[5:] if pci_address.startswith('0000:') else pci_address
+            pci_details[pcie_id] = details
+            LOGGER.debug('Found GPU pci in sysfs: %s: %s', pcie_id, details)
+
+        cls.read_pciid_names(pci_details)
+        for details in pci_details.values():
+            vendor_name = details.get('vendor_name', cls._pci_vendor_names.get(details['vendor'],
+                                                                               'Vendor {}'.format(details['vendor'])))
+            device_name = details.get('device_name', 'Device {}'.format(details['device']))
+            details['name'] = '{} {}'.format(vendor_name, device_name)
+            if details['revision'] and int(details['revision'], 16):
+                details['name'] += ' (rev {})'.format(details['revision'][-2:].zfill(2))
+            details.setdefault('subsystem_name', '')
+        return pci_details
+
     def set_gpu_list(self, clinfo_flag: bool = False) -> bool:
-        """ Use lspci to populate list of all installed GPUs.
+        """ Populate list of all installed GPUs.  The discovery cache is used if enabled and valid,
+            otherwise GPUs are discovered from sysfs, or lspci if not available.
 
+        :param clinfo_flag: If True, start reading OpenCL details in the background.  Use wait_opencl_data
+            to set them for each GPU.
         :return: True on success
         """
-        if not GUT_CONST.cmd_lspci: return False
+        # Check AMD writability
+        self.set_amd_writability()
+
+        # Check NV read/writability
+        if GUT_CONST.cmd_nvidia_smi:
+            self.nv_readwritable = True
+
+        if not (GUT_CONST.use_cache and self.read_discovery_cache()):
+            if not self.discover_gpus(): return False
+            if GUT_CONST.use_cache: self.write_discovery_cache()
         if clinfo_flag:
-            self.read_gpu_opencl_data()
-            LOGGER.debug('OpenCL map: %s', self.opencl_map)
+            self.start_opencl_read()
+        for gpu in self.gpus():
+            gpu.compile_read_plan()
+        return True
 
-        # Check AMD writability
+    def set_amd_writability(self) -> None:
+        """ Set AMD writability from the amdgpu featuremask.
+        """
         try:
             self.amd_featuremask = GUT_CONST.read_amdfeaturemask()
         except FileNotFoundError:
@@ -2075,14 +2700,241 @@ class GpuList:
                                                 self.amd_featuremask == int(0xffffffff) or
                                                 self.amd_featuremask == int(0xfffd7fff))
 
-        # Check NV read/writability
-        if GUT_CONST.cmd_nvidia_smi:
-            self.nv_readwritable = True
+    @staticmethod
+    def read_drm_index() -> Dict[str, Dict[str, Union[str, List[str]]]]:
+        """ Scan the DRM class directory once and index card, hwmon, and render node paths by PCIe
+            bus id.
+
+        :return: Dictionary of bus id key to dict of card_path, sys_card_path, hwmon_paths, and render_node.
+        """
+        drm_index: Dict[str, Dict[str, Union[str, List[str]]]] = {}
+        if not os.path.isdir(GUT_CONST.card_root): return drm_index
+        for drm_name in sorted(os.listdir(GUT_CONST.card_root)):
+            drm_node = re.fullmatch(r'(card|renderD)(\d+)', drm_name)
+            if not drm_node: continue
+            device_dir = os.path.join(GUT_CONST.card_root, drm_name, 'device')
+            if not os.path.isdir(device_dir): continue
+            sys_card_path = os.path.realpath(device_dir)
+            drm_details = drm_index.setdefault(bus_id_key(os.path.basename(sys_card_path)),
+                                               {'card_path': '', 'sys_card_path': sys_card_path,
+                                                'hwmon_paths': [], 'render_node': ''})
+            if drm_node.group(1) == 'renderD':
+                drm_details['render_node'] = os.path.join('/dev/dri', drm_name)
+                continue
+            drm_details['card_path'] = device_dir
+            hwmon_dir = os.path.dirname(os.path.join(device_dir, GUT_CONST.hwmon_sub))
+            if os.path.isdir(hwmon_dir):
+                drm_details['hwmon_paths'] = [os.path.join(hwmon_dir, hwmon_name)
+                                              for hwmon_name in sorted(os.listdir(hwmon_dir))
+                                              if re.fullmatch(r'hwmon\d+', hwmon_name)]
+        LOGGER.debug('DRM index: %s', drm_index)
+        return drm_index
+
+    def discovery_cache_key(self) -> Dict[str, Any]:
+        """ Get the key which identifies the system state that discovery results depend on: boot,
+            kernel, PCI and DRM topology, featuremask, and available commands.
+
+        :return: Dictionary of key items.
+        """
+        try:
+            with open('/proc/sys/kernel/random/boot_id', 'r', encoding='utf-8') as boot_id_file_ptr:
+                boot_id = boot_id_file_ptr.read().strip()
+        except OSError:
+            boot_id = None
+        drm_cards: Dict[str, str] = {}
+        if os.path.isdir(GUT_CONST.card_root):
+            for card_name in os.listdir(GUT_CONST.card_root):
+                device_path = os.path.join(GUT_CONST.card_root, card_name, 'device')
+                if os.path.islink(device_path):
+                    drm_cards[card_name] = os.readlink(device_path)
+        return {'version': __version__, 'boot_id': boot_id, 'kernel': release(),
+                'pci': sorted(os.listdir(GUT_CONST.pci_root)) if os.path.isdir(GUT_CONST.pci_root) else None,
+                'drm': drm_cards, 'featuremask': self.amd_featuremask, 'pciid': GUT_CONST.sys_pciid,
+                'commands': [GUT_CONST.cmd_lspci, GUT_CONST.cmd_nvidia_smi, GUT_CONST.cmd_clinfo]}
+
+    def read_discovery_cache(self) -> bool:
+        """ Populate the GPU list from the discovery cache if it is valid for the current system.
+
+        :return: True if GPU list was populated from the cache.
+        """
+        cache_file = os.path.join(GUT_CONST.cache_dir, self.discovery_cache_file)
+        if not os.path.isfile(cache_file): return False
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as cache_file_ptr:
+                cache_data = json.load(cache_file_ptr)
+        except (OSError, ValueError) as except_err:
+            LOGGER.debug('Can not read discovery cache [%s]: %s', cache_file, except_err)
+            return False
+        if not isinstance(cache_data, dict) or cache_data.get('key') != self.discovery_cache_key():
+            LOGGER.debug('Discovery cache [%s] is not valid for current system', cache_file)
+            return False
+        gpu_items: List[GpuItem] = []
+        try:
+            for gpu_data in cache_data['gpus']:
+                prm = gpu_data['prm']
+                for path_name in ('card_path', 'hwmon_path'):
+                    if prm[path_name] and not os.path.isdir(prm[path_name]):
+                        LOGGER.debug('Discovery cache path [%s] not found', prm[path_name])
+                        return False
+                for param_name, enum_cls in self._cache_enum_params.items():
+                    prm[param_name] = enum_cls[prm[param_name]]
+                gpu_item = GpuItem(prm['uuid'])
+                gpu_item.prm.update(prm)
+                gpu_item.read_skip = set(gpu_data['read_skip'])
+                gpu_item.read_disabled = list(gpu_data['read_disabled'])
+                gpu_item.write_disabled = list(gpu_data['write_disabled'])
+                gpu_items.append(gpu_item)
+        except (KeyError, TypeError) as except_err:
+            LOGGER.debug('Discovery cache [%s] is not valid: %s', cache_file, except_err)
+            return False
+        for gpu_item in gpu_items:
+            self.add(gpu_item)
+        LOGGER.debug('Read %s GPUs from discovery cache [%s]', len(self.list), cache_file)
+        return True
+
+    def write_discovery_cache(self) -> None:
+        """ Save the results of discovery to the discovery cache.  Failure to write is not an error.
+        """
+        cache_file = os.path.join(GUT_CONST.cache_dir, self.discovery_cache_file)
+        gpus_data: List[Dict[str, Any]] = []
+        for gpu in self.gpus():
+            prm = dict(gpu.prm)
+            for param_name in self._cache_enum_params:
+                prm[param_name] = prm[param_name].name
+            gpus_data.append({'prm': prm, 'read_skip': sorted(gpu.read_skip),
+                              'read_disabled': gpu.read_disabled, 'write_disabled': gpu.write_disabled})
+        tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        try:
+            os.makedirs(GUT_CONST.cache_dir, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as cache_file_ptr:
+                json.dump({'key': self.discovery_cache_key(), 'gpus': gpus_data}, cache_file_ptr)
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError) as except_err:
+            LOGGER.debug('Can not write discovery cache [%s]: %s', cache_file, except_err)
+
+    def opencl_cache_key(self) -> Dict[str, Any]:
+        """ Get the key which identifies the system state that OpenCL details depend on: driver
+            versions, installed OpenCL ICDs, and PCI topology of the GPUs.
+
+        :return: Dictionary of key items.
+        """
+        drivers: Dict[str, Optional[str]] = {}
+        for module_name in self._ocl_driver_modules:
+            try:
+                drivers[module_name] = read_sensor_file(os.path.join('/sys/module', module_name, 'version')).strip()
+            except OSError:
+                drivers[module_name] = None
+        icds: Dict[str, int] = {}
+        if os.path.isdir(self._ocl_icd_dir):
+            for icd_name in os.listdir(self._ocl_icd_dir):
+                icd_path = os.path.join(self._ocl_icd_dir, icd_name)
+                try:
+                    icds[icd_name] = os.stat(icd_path).st_mtime_ns
+                except OSError:
+                    continue
+        try:
+            clinfo_mtime = os.stat(GUT_CONST.cmd_clinfo).st_mtime_ns
+        except (OSError, TypeError):
+            clinfo_mtime = None
+        return {'version': __version__, 'kernel': release(), 'drivers': drivers, 'icds': icds,
+                'clinfo': [GUT_CONST.cmd_clinfo, clinfo_mtime],
+                'pci': sorted(gpu.prm.pcie_id for gpu in self.gpus())}
+
+    def read_opencl_cache(self) -> bool:
+        """ Set the OpenCL map from the OpenCL cache if it is valid for the current system.
+
+        :return: True if the OpenCL map was read from the cache.
+        """
+        cache_file = os.path.join(GUT_CONST.cache_dir, self.opencl_cache_file)
+        if not os.path.isfile(cache_file): return False
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as cache_file_ptr:
+                cache_data = json.load(cache_file_ptr)
+        except (OSError, ValueError) as except_err:
+            LOGGER.debug('Can not read OpenCL cache [%s]: %s', cache_file, except_err)
+            return False
+        if not isinstance(cache_data, dict) or cache_data.get('key') != self.opencl_cache_key() or \
+                not isinstance(cache_data.get('opencl_map'), dict):
+            LOGGER.debug('OpenCL cache [%s] is not valid for current system', cache_file)
+            return False
+        self.opencl_map = cache_data['opencl_map']
+        LOGGER.debug('Read OpenCL map from cache [%s]', cache_file)
+        return True
+
+    def write_opencl_cache(self) -> None:
+        """ Save the OpenCL map to the OpenCL cache.  Failure to write is not an error.
+        """
+        cache_file = os.path.join(GUT_CONST.cache_dir, self.opencl_cache_file)
+        tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        try:
+            os.makedirs(GUT_CONST.cache_dir, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as cache_file_ptr:
+                json.dump({'key': self.opencl_cache_key(), 'opencl_map': self.opencl_map}, cache_file_ptr)
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError) as except_err:
+            LOGGER.debug('Can not write OpenCL cache [%s]: %s', cache_file, except_err)
+
+    def read_opencl_map(self) -> None:
+        """ Set the OpenCL map from the cache if valid, otherwise from clinfo, updating the cache.
+        """
+        if GUT_CONST.use_cache and self.read_opencl_cache(): return
+        if self.read_gpu_opencl_data() and GUT_CONST.use_cache:
+            self.write_opencl_cache()
+
+    def start_opencl_read(self) -> None:
+        """ Start reading OpenCL details in a background thread so that discovery does not wait
+            for clinfo.  Use wait_opencl_data to set the results in the GPU list.
+        """
+        if self.opencl_thread: return
+        self.opencl_thread = threading.Thread(target=self.read_opencl_map, name='gpu-utils-clinfo', daemon=True)
+        self.opencl_thread.start()
+
+    def wait_opencl_data(self, timeout: Optional[float] = None) -> bool:
+        """ Wait for the background OpenCL read to complete and set compute details for each GPU.
+
+        :param timeout: Maximum time to wait in seconds, or None to wait until complete.
+        :return: True if OpenCL details were set.
+        """
+        if not self.opencl_thread: return False
+        self.opencl_thread.join(timeout)
+        if self.opencl_thread.is_alive():
+            LOGGER.debug('OpenCL read not complete after %s sec', timeout)
+            return False
+        self.opencl_thread = None
+        self.set_opencl_values()
+        return True
+
+    def set_opencl_values(self) -> None:
+        """ Set compute details for each GPU from the OpenCL map.
+        """
+        LOGGER.debug('OpenCL map: %s', self.opencl_map)
+        for gpu in self.gpus():
+            pcie_id = gpu.prm.pcie_id
+            opencl_device_version = None
+            compute = False
+            if self.opencl_map:
+                if pcie_id in self.opencl_map:
+                    if 'device_version' in self.opencl_map[pcie_id]:
+                        opencl_device_version = self.opencl_map[pcie_id]['device_version']
+                        compute = True
+            else:
+                compute = 'Unknown' if not GUT_CONST.cmd_clinfo else False
+            gpu.populate_prm_from_dict({'compute': compute, 'compute_platform': opencl_device_version})
+            if pcie_id in self.opencl_map:
+                gpu.set_clinfo_values(self.opencl_map[pcie_id])
 
-        pcie_ids = self.get_gpu_pci_list()
+    def discover_gpus(self) -> bool:
+        """ Use sysfs, or lspci if not available, to populate list of all installed GPUs.
+
+        :return: True on success
+        """
+        pci_details = self.read_pci_sysfs()
+        if not pci_details and not GUT_CONST.cmd_lspci: return False
+        pcie_ids = list(pci_details) if pci_details else self.get_gpu_pci_list()
         if not pcie_ids:
-            print('Error [empty list]: lspci failed to find GPUs')
+            print('Error [empty list]: failed to find GPUs')
             return False
+        drm_index = self.read_drm_index()
 
         LOGGER.debug('Found %s GPUs', len(pcie_ids))
         for pcie_id in pcie_ids:
@@ -2098,26 +2950,42 @@ class GpuList:
             readable = writable = compute = False
             gpu_type = GpuType.Undefined
             vendor = GpuVendor.Undefined
-            opencl_device_version = None if clinfo_flag else 'UNKNOWN'
+            opencl_device_version = 'UNKNOWN'
+
+            if pci_details:
+                # Get Long GPU Name, subsystem name, and driver from sysfs details
+                gpu_name = pci_details[pcie_id]['name']
+                subsystem_name = pci_details[pcie_id]['subsystem_name']
+                driver_module = pci_details[pcie_id]['driver']
+            else:
+                # Get more GPU details from lspci -k -s
+                cmd_str = '{} -k -s {}'.format(GUT_CONST.cmd_lspci, pcie_id)
+                try:
+                    lspci_items = subprocess.check_output(shlex_split(cmd_str), shell=False).decode().split('\n')
+                except (subprocess.CalledProcessError, OSError) as except_err:
+                    message = 'Fatal Error [{}]: Can not get GPU details with lspci.'.format(except_err)
+                    LOGGER.debug(message)
+                    print(message, file=sys.stderr)
+                    sys.exit(-1)
+                LOGGER.debug('lspci output items:\n %s', lspci_items)
+
+                # Get Long GPU Name
+                gpu_name_items = lspci_items[0].split(': ', maxsplit=1)
+                if len(gpu_name_items) >= 2:
+                    gpu_name = gpu_name_items[1]
+                subsystem_items = lspci_items[1].split('[AMD/ATI]') if len(lspci_items) > 1 else []
+                subsystem_name = subsystem_items[1] if len(subsystem_items) > 1 else ''
+
+                # Get Driver Name
+                for lspci_line in lspci_items:
+                    if re.search(r'([kK]ernel)', lspci_line):
+                        driver_module_items = lspci_line.split(': ')
+                        if len(driver_module_items) >= 2:
+                            driver_module = driver_module_items[1].strip()
 
-            # Get more GPU details from lspci -k -s
-            cmd_str = '{} -k -s {}'.format(GUT_CONST.cmd_lspci, pcie_id)
-            try:
-                lspci_items = subprocess.check_output(shlex_split(cmd_str), shell=False).decode().split('\n')
-            except (subprocess.CalledProcessError, OSError) as except_err:
-                message = 'Fatal Error [{}]: Can not get GPU details with lspci.'.format(except_err)
-                LOGGER.debug(message)
-                print(message, file=sys.stderr)
-                sys.exit(-1)
-            LOGGER.debug('lspci output items:\n %s', lspci_items)
-
-            # Get Long GPU Name
-            gpu_name_items = lspci_items[0].split(': ', maxsplit=1)
-            if len(gpu_name_items) >= 2:
-                gpu_name = gpu_name_items[1]
             # Check for Fiji ProDuo
             if re.search('Fiji', gpu_name):
-                if re.search(r'Radeon Pro Duo', lspci_items[1].split('[AMD/ATI]')[1]):
+                if re.search(r'Radeon Pro Duo', subsystem_name):
                     gpu_name = 'Radeon Fiji Pro Duo'
             LOGGER.debug('gpu_name: [%s]', gpu_name)
 
@@ -2141,34 +3009,15 @@ class GpuList:
                 vendor = GpuVendor.MATROX
                 gpu_type = GpuType.Unsupported
 
-            # Set compute flag
-            if self.opencl_map:
-                if pcie_id in self.opencl_map:
-                    if 'device_version' in self.opencl_map[pcie_id]:
-                        opencl_device_version = self.opencl_map[pcie_id]['device_version']
-                        compute = True
-                    else:
-                        compute = False
-            else:
-                compute = 'Unknown' if not GUT_CONST.cmd_clinfo else False
-
-            # Get Driver Name
-            for lspci_line in lspci_items:
-                if re.search(r'([kK]ernel)', lspci_line):
-                    driver_module_items = lspci_line.split(': ')
-                    if len(driver_module_items) >= 2:
-                        driver_module = driver_module_items[1].strip()
+            # Set compute flag, updated by set_opencl_values if OpenCL details are read
+            compute = 'Unknown' if not GUT_CONST.cmd_clinfo else False
 
             # Get full card path
-            device_dirs = glob(os.path.join(GUT_CONST.card_root, 'card?/device'))
-            # Match system device directory to pcie ID.
-            for device_dir in device_dirs:
-                sysfspath = str(Path(device_dir).resolve())
-                LOGGER.debug('sysfpath: %s\ndevice_dir: %s', sysfspath, device_dir)
-                if pcie_id in (sysfspath[-7:], sysfspath[-12:]):
-                    card_path = device_dir
-                    sys_card_path = sysfspath
-                    LOGGER.debug('card_path set to: %s', device_dir)
+            drm_details = drm_index.get(bus_id_key(pcie_id))
+            if drm_details and drm_details['card_path']:
+                card_path = drm_details['card_path']
+                sys_card_path = drm_details['sys_card_path']
+                LOGGER.debug('card_path set to: %s', card_path)
 
             # No card path could be found.  Set readable/writable to False and type to Unsupported
             if not card_path:
@@ -2177,8 +3026,8 @@ class GpuList:
                 gpu_type = GpuType.Unsupported
                 readable = writable = False
                 try_path = '/sys/devices/pci*:*/'
-                sys_pci_dirs = None
-                for _ in range(6):
+                sys_pci_dirs = [drm_details['sys_card_path']] if drm_details else []
+                for _ in range(0 if sys_pci_dirs else 6):
                     if re.fullmatch(GUT_CONST.PATTERNS[PK.PCI_ADD_SHRT], pcie_id):
                         search_path = os.path.join(try_path, '????:{}'.format(pcie_id))
                     else:
@@ -2201,8 +3050,7 @@ class GpuList:
 
             # Get full hwmon path
             if card_path:
-                LOGGER.debug('Card dir [%s] contents:\n%s', card_path, list(os.listdir(card_path)))
-                hw_file_srch = glob(os.path.join(card_path, GUT_CONST.hwmon_sub) + '?')
+                hw_file_srch = drm_details['hwmon_paths']
                 LOGGER.debug('HW file search: %s', hw_file_srch)
                 if len(hw_file_srch) > 1:
                     GUT_CONST.process_message('More than one hwmon file found: {}'.format(hw_file_srch))
@@ -2280,9 +3128,6 @@ class GpuList:
             rdata = self[gpu_uuid].read_gpu_sensor('id', vendor=GpuVendor.PCIE, sensor_type='DEVICE')
             if rdata:
                 self[gpu_uuid].set_params_value('id', rdata)
-            if clinfo_flag:
-                if pcie_id in self.opencl_map:
-                    self[gpu_uuid].set_clinfo_values(self.opencl_map[pcie_id])
         return True
 
     def read_gpu_opencl_data(self) -> bool:
@@ -2294,8 +3139,14 @@ class GpuList:
         if not GUT_CONST.cmd_clinfo: return False
 
         # Run the clinfo command
-        with subprocess.Popen(shlex_split('{} --raw'.format(GUT_CONST.cmd_clinfo)),
-                              shell=False, stdout=subprocess.PIPE) as cmd:
+        opencl_map: dict = {}
+        try:
+            cmd = subprocess.Popen(shlex_split('{} --raw'.format(GUT_CONST.cmd_clinfo)),
+                                   shell=False, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as except_err:
+            LOGGER.debug('Can not run clinfo: %s', except_err)
+            return False
+        with cmd:
 
             # Clinfo Keywords and related opencl_map key.
             ocl_keywords = {'CL_KERNEL_PREFERRED_WORK_GROUP_SIZE_MULTIPLE': 'prf_wg_multiple',
@@ -2348,9 +3199,9 @@ class GpuList:
                 # If new cl_index, then update opencl_map
                 if cl_vendor != ocl_vendor or cl_index != ocl_index:
                     # Update opencl_map with dict variables when new index is encountered.
-                    self.opencl_map.update({ocl_pcie_id: temp_map})
+                    opencl_map.update({ocl_pcie_id: temp_map})
                     LOGGER.debug('cl_vendor: %s, cl_index: %s, pcie_id: %s',
-                                 ocl_vendor, ocl_index, self.opencl_map[ocl_pcie_id])
+                                 ocl_vendor, ocl_index, opencl_map[ocl_pcie_id])
 
                     # Initialize dict variables
                     ocl_index = cl_index
@@ -2360,11 +3211,11 @@ class GpuList:
 
                 param_str = line_items[1]
                 # Check item in clinfo_keywords
-                for clinfo_keyword, opencl_map_keyword in ocl_keywords.items():
-                    if clinfo_keyword in param_str:
-                        temp_map[opencl_map_keyword] = line_items[2].strip()
-                        LOGGER.debug('openCL map %s: [%s]', clinfo_keyword, temp_map[opencl_map_keyword])
-                        continue
+                opencl_map_keyword = ocl_keywords.get(param_str)
+                if opencl_map_keyword:
+                    temp_map[opencl_map_keyword] = line_items[2].strip()
+                    LOGGER.debug('openCL map %s: [%s]', param_str, temp_map[opencl_map_keyword])
+                    continue
 
                 # PCIe ID related clinfo_keywords
                 # Check for AMD pcie_id details
@@ -2392,7 +3243,8 @@ class GpuList:
                 # Check for INTEL pcie_id details
                 # TODO: Don't know how extract Intel pcie_id details.
 
-        self.opencl_map.update({ocl_pcie_id: temp_map})
+        opencl_map.update({ocl_pcie_id: temp_map})
+        self.opencl_map = opencl_map
         return True
 
     def num_vendor_gpus(self, compatibility: GpuCompatibility = GpuCompatibility.ALL) -> Dict[str, int]:
@@ -2526,14 +3378,220 @@ class GpuList:
             if gpu.prm.readable:
                 gpu.read_gpu_pstates()
 
-    def read_gpu_sensor_set(self, data_type: SensorSet = SensorSet.All) -> None:
-        """ Read sensor data from all GPUs in self.list.
+    def set_fields(self, fields: Optional[List[str]], set_table: bool = True) -> None:
+        """ Read only the sensors needed for the given table parameters in Monitor reads.  Must be
+            called before starting the NV stream.
 
-        :param data_type: Specifies the sensor set to use in the read.
+        :param fields: List of table parameter names, or None to read all Monitor sensors.
+        :param set_table: If True, also limit table parameters to the given fields.
+        :raises KeyError: If a field is not a valid table parameter.
         """
+        field_params = GpuItem.resolve_fields(fields) if fields else None
+        if fields and set_table: GpuItem.set_table_fields(fields)
+        LOGGER.debug('Field params for %s: %s', fields, field_params)
         for gpu in self.gpus():
+            gpu.set_field_params(field_params)
+            if not fields: continue
+            for table_item in gpu.table_parameters_status:
+                if table_item not in fields: gpu.table_parameters_status[table_item] = False
+
+    def read_gpu_sensor_set(self, data_type: SensorSet = SensorSet.All, interval: Optional[float] = None) -> None:
+        """ Read sensor data from all GPUs in self.list.  GPUs are read concurrently if the parallel
+            option is set.
+
+        :param data_type: Specifies the sensor set to use in the read.
+        :param interval: Update interval in seconds, which sets the read budget of each GPU in parallel
+            mode.  None waits for all.
+        """
+        # All GPUs in a poll share the same time stamps.
+        read_time = (monotonic(), GUT_CONST.now(GUT_CONST.useltz))
+        nv_uuids = self.read_gpu_sensor_set_nv(data_type, read_time)
+        if GUT_CONST.parallel and len(self.list) - len(nv_uuids) > 1:
+            self.read_gpu_sensor_set_parallel(data_type, interval, skip_uuids=nv_uuids, read_time=read_time)
+            return
+        for uuid, gpu in self.list.items():
+            if uuid in nv_uuids: continue
             if gpu.prm.readable or GUT_CONST.force_all:
-                gpu.read_gpu_sensor_set(data_type)
+                gpu.read_gpu_sensor_set(data_type, read_time)
+
+    def read_gpu_sensor_set_nv(self, data_type: SensorSet = SensorSet.All,
+                               read_time: Optional[Tuple[float, datetime]] = None) -> Set[str]:
+        """ Read sensor data for all validated NVIDIA GPUs with a single nvidia-smi query.  Results are
+            assigned to each GPU by PCIe bus id.  GPUs not yet validated or missing from the results
+            are left to be read individually.
+
+        :param data_type: Specifies the sensor set to use in the read.
+        :param read_time: Monotonic and wall clock time stamps of the poll.  Current time if None.
+        :return: Set of uuids for GPUs updated by the combined query.
+        """
+        nv_gpus: Dict[str, GpuItem] = {}
+        for gpu in self.gpus():
+            if gpu.prm.vendor != GpuVendor.NVIDIA or not gpu.validated_sensors: continue
+            if not gpu.prm.pcie_id or not (gpu.prm.readable or GUT_CONST.force_all): continue
+            nv_gpus[bus_id_key(gpu.prm.pcie_id)] = gpu
+        if not nv_gpus or not GUT_CONST.cmd_nvidia_smi or data_type not in GpuItem.nv_query_items:
+            return set()
+        start_time = monotonic()
+        if not read_time: read_time = (start_time, GUT_CONST.now(GUT_CONST.useltz))
+        for gpu in nv_gpus.values():
+            gpu.set_read_time(read_time)
+
+        if data_type == SensorSet.Monitor and self.nvml:
+            updated_uuids: Set[str] = set()
+            for pcie_id, gpu in nv_gpus.items():
+                values = self.nvml.read(pcie_id, gpu.get_nv_query_list(data_type))
+                if values is None: continue
+                gpu.set_nv_sensor_values(values)
+                gpu.update_table_items_status()
+                gpu.take_snapshot(monotonic() - start_time)
+                updated_uuids.add(gpu.prm.uuid)
+            if len(updated_uuids) == len(nv_gpus):
+                return updated_uuids
+            LOGGER.debug('NVML read failed for some GPUs, using nvidia-smi for all')
+
+        if data_type == SensorSet.Monitor and self.nv_stream and self.nv_stream.is_running():
+            max_age = 2.0 * self.nv_stream.loop_ms / 1000.0 + 1.0
+            samples = {pcie_id: self.nv_stream.get_sample(pcie_id, max_age) for pcie_id in nv_gpus}
+            if all(samples.values()):
+                for pcie_id, gpu in nv_gpus.items():
+                    gpu_query_list = gpu.get_nv_query_list(data_type)
+                    gpu.set_nv_query_results(data_type, {item: value for item, value in samples[pcie_id].items()
+                                                         if item in gpu_query_list})
+                    gpu.update_table_items_status()
+                    gpu.take_snapshot(monotonic() - start_time)
+                return {gpu.prm.uuid for gpu in nv_gpus.values()}
+            LOGGER.debug('NV stream sample not available for all GPUs, using combined query')
+
+        query_list: List[str] = []
+        for gpu in nv_gpus.values():
+            query_list.extend(item for item in gpu.get_nv_query_list(data_type) if item not in query_list)
+        cmd_str = '{} --query-gpu=pci.bus_id,{} --format=csv,noheader,nounits'.format(
+                  GUT_CONST.cmd_nvidia_smi, ','.join(query_list))
+        LOGGER.debug('NV command:\n%s', cmd_str)
+        try:
+            nsmi_lines = subprocess.check_output(shlex_split(cmd_str), shell=False,
+                                                 stderr=subprocess.DEVNULL).decode().split('\n')
+        except (subprocess.CalledProcessError, OSError) as except_err:
+            LOGGER.debug('NV combined query error, using per GPU query: [%s]', except_err)
+            return set()
+
+        updated_uuids: Set[str] = set()
+        for nsmi_line in nsmi_lines:
+            nsmi_items = [item.strip() for item in nsmi_line.split(',')]
+            if len(nsmi_items) != len(query_list) + 1: continue
+            gpu = nv_gpus.get(bus_id_key(nsmi_items[0]))
+            if not gpu: continue
+            gpu_query_list = gpu.get_nv_query_list(data_type)
+            results = {item: value for item, value in zip(query_list, nsmi_items[1:]) if item in gpu_query_list}
+            gpu.set_nv_query_results(data_type, results)
+            gpu.update_table_items_status()
+            gpu.take_snapshot(monotonic() - start_time)
+            updated_uuids.add(gpu.prm.uuid)
+        LOGGER.debug('NV combined query updated %s of %s GPUs', len(updated_uuids), len(nv_gpus))
+        return updated_uuids
+
+    def start_nvml(self, nvml: Optional[NvmlBackend] = None) -> bool:
+        """ Use NVML for Monitor reads of NVIDIA GPUs, if available.  Reads fall back to nvidia-smi
+            for GPUs that NVML can not read.
+
+        :param nvml: The backend to use.  A backend using libnvidia-ml is created if None.
+        :return: True if the NVML backend is active.
+        """
+        if not any(gpu.prm.vendor == GpuVendor.NVIDIA for gpu in self.gpus()): return False
+        self.nvml = nvml if nvml else NvmlBackend.create()
+        return bool(self.nvml)
+
+    def start_nv_stream(self, loop_ms: int = 1000) -> bool:
+        """ Start a long-lived nvidia-smi loop query for the Monitor sensor set of all NVIDIA GPUs.
+            Monitor reads then use the latest streamed sample instead of running nvidia-smi.
+
+        :param loop_ms: The nvidia-smi sample period in ms.
+        :return: True if the stream was started.
+        """
+        if not GUT_CONST.cmd_nvidia_smi: return False
+        query_list: List[str] = []
+        for gpu in self.gpus():
+            if gpu.prm.vendor != GpuVendor.NVIDIA or not (gpu.prm.readable or GUT_CONST.force_all): continue
+            query_list.extend(item for item in gpu.get_nv_query_list(SensorSet.Monitor) if item not in query_list)
+        if not query_list: return False
+        if self.nv_stream: self.nv_stream.stop()
+        self.nv_stream = NvSmiStream(GUT_CONST.cmd_nvidia_smi, query_list, loop_ms)
+        self.nv_stream.start()
+        return True
+
+    def stop_nv_stream(self) -> None:
+        """ Stop the nvidia-smi loop query if running.
+        """
+        if self.nv_stream:
+            self.nv_stream.stop()
+            self.nv_stream = None
+
+    def read_gpu_sensor_set_parallel(self, data_type: SensorSet = SensorSet.All, interval: Optional[float] = None,
+                                     skip_uuids: Optional[Set[str]] = None,
+                                     read_time: Optional[Tuple[float, datetime]] = None) -> None:
+        """ Read sensor data from all GPUs concurrently using a bounded thread pool.  Each GPU read has
+            a budget of read_budget_fraction of the interval from the start of the read.  A read which
+            exceeds its budget is expired, so it does not set a snapshot and the GPU keeps its previous
+            snapshot.  It is left to finish in the background and is not resubmitted until it completes,
+            so a slow GPU does not delay the others.  The late read still sets its values in prm, where
+            parameters not in the snapshot are read from, and the next read of the GPU replaces them.
+
+        :param data_type: Specifies the sensor set to use in the read.
+        :param interval: Update interval in seconds.  None waits for all reads to complete.
+        :param skip_uuids: GPUs already read which are to be skipped.
+        :param read_time: Monotonic and wall clock time stamps of the poll.  Current time if None.
+        """
+        if not self.read_executor:
+            self.read_executor = ThreadPoolExecutor(max_workers=min(len(self.list), GUT_CONST.max_read_workers),
+                                                    thread_name_prefix='gpu-read')
+        read_start: Dict[str, float] = {}
+
+        def read_gpu(uuid: str, gpu: GpuItem, expired: threading.Event) -> bool:
+            read_start[uuid] = monotonic()
+            return gpu.read_gpu_sensor_set(data_type, read_time, expired)
+
+        futures: Dict[str, Future] = {}
+        expired_events: Dict[str, threading.Event] = {}
+        for uuid, gpu in self.list.items():
+            if not (gpu.prm.readable or GUT_CONST.force_all): continue
+            if skip_uuids and uuid in skip_uuids: continue
+            pending_read = self.pending_reads.get(uuid)
+            if pending_read and not pending_read.done():
+                LOGGER.debug('Previous read of card%s still in progress, skipping', gpu.prm.card_num)
+                continue
+            expired_events[uuid] = threading.Event()
+            futures[uuid] = self.read_executor.submit(read_gpu, uuid, gpu, expired_events[uuid])
+        self.pending_reads.update(futures)
+        if not futures: return
+
+        budget = interval * GUT_CONST.read_budget_fraction if interval else None
+        submit_time = monotonic()
+        pending = dict(futures)
+        while pending:
+            if budget is None:
+                futures_wait(pending.values())
+                expiry: Dict[str, float] = {}
+            else:
+                # Reads waiting for a worker are timed from submission.
+                expiry = {uuid: read_start.get(uuid, submit_time) + budget for uuid in pending}
+                futures_wait(pending.values(), timeout=max(0.0, min(expiry.values()) - monotonic()),
+                             return_when=FIRST_COMPLETED)
+            now = monotonic()
+            for uuid, future in list(pending.items()):
+                if not future.done():
+                    if expiry[uuid] > now: continue
+                    with self[uuid].read_lock:
+                        # A read which has not yet published its snapshot will discard it.
+                        if not future.done(): expired_events[uuid].set()
+                    if expired_events[uuid].is_set():
+                        LOGGER.debug('Read of card%s exceeded budget of %.3fs', self[uuid].prm.card_num, budget)
+                        del pending[uuid]
+                        continue
+                del pending[uuid]
+                except_err = future.exception()
+                if except_err:
+                    LOGGER.debug('Read of card%s failed: %s', self[uuid].prm.card_num, except_err)
+                    raise except_err
 
     # Printing Methods follow.
     def print_raw(self) -> None:
@@ -2588,8 +3646,7 @@ class GpuList:
         for table_item in GpuItem.table_parameters:
             print('│{}{:<13}{}'.format(color, str(GpuItem.table_param_labels[table_item])[:13], color_reset), end='')
             for gpu in self.gpus():
-                data_value_raw = gpu.get_params_value(table_item)
-                data_value_raw = format_table_value(data_value_raw, table_item)
+                data_value_raw = gpu.get_table_value(table_item)
                 print('│{:<20}'.format(str(data_value_raw)[:table_width].center(table_width)), end='')
             print('│')
 
@@ -2611,6 +3668,9 @@ class GpuList:
         print('Time|Card#', end='', file=log_file_ptr)
         for table_item in GpuItem.table_parameters:
             print('|{}'.format(table_item), end='', file=log_file_ptr)
+        for table_item in GpuItem.aggregate_fields:
+            for stat in GpuItem.aggregate_log_stats:
+                print('|{}_{}'.format(table_item, stat), end='', file=log_file_ptr)
         print('', file=log_file_ptr)
         return True
 
@@ -2624,14 +3684,25 @@ class GpuList:
 
         # Print Data
         for gpu in self.gpus():
-            print('{}|{}'.format(gpu.get_params_value('read_time').strftime(GUT_CONST.TIME_FORMAT), gpu.prm.card_num),
+            print('{}|{}'.format(gpu.get_snapshot_value('read_time').strftime(GUT_CONST.TIME_FORMAT), gpu.prm.card_num),
                   sep='', end='', file=log_file_ptr)
             for table_item in GpuItem.table_parameters:
-                print('|{}'.format(re.sub(PATTERNS[PK.MHz], '', str(gpu.get_params_value(table_item)).strip())),
+                print('|{}'.format(re.sub(PATTERNS[PK.MHz], '', str(gpu.get_aggregate_value(table_item)).strip())),
                       sep='', end='', file=log_file_ptr)
+            for table_item in GpuItem.aggregate_fields:
+                for stat in GpuItem.aggregate_log_stats:
+                    print('|{}'.format(format_table_value(gpu.get_aggregate_value(table_item, stat), table_item)),
+                          sep='', end='', file=log_file_ptr)
             print('', file=log_file_ptr)
         return True
 
+    def set_plot_format(self, plot_format: str) -> None:
+        """ Set the format of the plot data written by print_plot_header and print_plot.
+
+        :param plot_format: 'binary' for the framed binary stream or 'text' for pipe delimited text.
+        """
+        self.plot_writer = PlotStreamWriter(GpuItem.table_parameters) if plot_format == 'binary' else None
+
     def print_plot_header(self, log_file_ptr: IO[Union[str, bytes]]) -> bool:
         """ Print the plot header.
 
@@ -2640,6 +3711,11 @@ class GpuList:
         """
         if self.num_gpus()['total'] < 1: return False
 
+        if self.plot_writer:
+            log_file_ptr.write(self.plot_writer.header_bytes())
+            log_file_ptr.flush()
+            return True
+
         # Print Header
         line_str_item = ['Time|Card#']
         for table_item in GpuItem.table_parameters:
@@ -2658,12 +3734,21 @@ class GpuList:
         """
         if self.num_gpus()['total'] < 1: return False
 
+        if self.plot_writer:
+            # All GPUs of a poll share the read time, so one frame holds the poll.
+            read_time = next(self.gpus()).get_snapshot_value('read_time')
+            log_file_ptr.write(self.plot_writer.frame_bytes(read_time, [
+                (gpu.prm.card_num, {table_item: gpu.get_aggregate_value(table_item)
+                                    for table_item in GpuItem.table_parameters}) for gpu in self.gpus()]))
+            log_file_ptr.flush()
+            return True
+
         # Print Data
         for gpu in self.gpus():
-            line_str_item = ['{}|{}'.format(str(gpu.get_params_value('read_time').strftime(GUT_CONST.TIME_FORMAT)),
+            line_str_item = ['{}|{}'.format(str(gpu.get_snapshot_value('read_time').strftime(GUT_CONST.TIME_FORMAT)),
                                             gpu.prm.card_num)]
             for table_item in GpuItem.table_parameters:
-                line_str_item.append('|' + re.sub(PATTERNS[PK.MHz], '', str(gpu.get_params_value(table_item))).strip())
+                line_str_item.append('|' + re.sub(PATTERNS[PK.MHz], '', str(gpu.get_aggregate_value(table_item))).strip())
             line_str_item.append('\n')
             line_str = ''.join(line_str_item)
             log_file_ptr.write(line_str.encode('utf-8'))
@@ -2683,10 +3768,11 @@ class GpuList:
 
 
 # Utility Helper Functions
-def print_driver_vendor_summary(gpu_list: GpuList) -> None:
+def print_driver_vendor_summary(gpu_list: GpuList, driver_version: bool = True) -> None:
     """ Display vendor and driver details.
 
     :param gpu_list: Target list of GPUs for the summary.
+    :param driver_version: If True, read and display the AMD driver package version.
     """
     num_gpus = gpu_list.num_vendor_gpus()
     print('Detected GPUs: ', end='')
@@ -2697,7 +3783,7 @@ def print_driver_vendor_summary(gpu_list: GpuList) -> None:
             print('{}: {}'.format(type_name, type_value), end='')
     print('')
     if 'AMD' in num_gpus:
-        GUT_CONST.read_amd_driver_version()
+        if driver_version: GUT_CONST.read_amd_driver_version()
         print('AMD: {}'.format(gpu_list.wattman_status()))
     if 'NV' in num_gpus:
         if GUT_CONST.cmd_nvidia_smi:
@@ -2718,15 +3804,19 @@ def set_mon_plot_compatible_gpu_list(gpu_list: GpuList) -> GpuList:
     return com_gpu_list
 
 
-def format_table_value(data_value_raw: Any, data_name: str) -> Union[str, int, float]:
+def format_table_value(data_value_raw: Any, data_name: str, suspended: bool = False) -> Union[str, int, float]:
     """ Format fields for monitor table.
 
     :param data_value_raw:
     :param data_name:
+    :param suspended: Show unavailable values as suspended if True
     :return: Formatted data value
     """
+    if suspended and (data_value_raw in {'', None, 'nan'} or
+                      (isinstance(data_value_raw, float) and isnan(data_value_raw))):
+        return 'suspended'
     if data_value_raw == 'nan':
-        return np_nan
+        return nan
     if isinstance(data_value_raw, float):
         if data_name == 'energy': return '{:.3e}'.format(data_value_raw) if data_value_raw > 0.0000001 else '---'
         return round(data_value_raw, 3)
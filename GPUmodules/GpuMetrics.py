@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+""" Parser for the amdgpu gpu_metrics binary driver file.  The gpu_metrics file contains a versioned
+    struct with temperatures, activity, power, and clocks which can be read with a single read.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import struct
+import logging
+from typing import Dict, Tuple, Optional, Union, NamedTuple
+
+LOGGER = logging.getLogger('gpu-utils')
+
+GpuMetricsValue = Union[float, Dict[str, float], None]
+
+HEADER = struct.Struct('<HBB')
+NA_U16 = 0xFFFF
+
+
+class MetricsFormat(NamedTuple):
+    """ Layout of the common prefix of a gpu_metrics format and the scale of its units.
+    """
+    layout: struct.Struct
+    names: Tuple[str, ...]
+    temp_scale: float
+    power_scale: float
+
+
+_CLOCKS_V1 = ('gfxclk', 'socclk', 'uclk', 'vclk0', 'dclk0', 'vclk1', 'dclk1')
+_TEMPS_V1 = ('temperature_edge', 'temperature_hotspot', 'temperature_mem',
+             'temperature_vrgfx', 'temperature_vrsoc', 'temperature_vrmem')
+_ACTIVITY_V1 = ('average_gfx_activity', 'average_umc_activity', 'average_mm_activity')
+
+# gpu_metrics_v1_0: dGPU, header followed by a 64-bit timestamp. Temperature in C, power in W.
+METRICS_V1_0 = MetricsFormat(
+    struct.Struct('<4x4xQ6H3HHI7H7HIH'),
+    ('system_clock_counter', *_TEMPS_V1, *_ACTIVITY_V1, 'average_socket_power', 'energy_accumulator',
+     *['average_{}_frequency'.format(clk) for clk in _CLOCKS_V1], *['current_{}'.format(clk) for clk in _CLOCKS_V1],
+     'throttle_status', 'current_fan_speed'),
+    1.0, 1.0)
+
+# gpu_metrics_v1_1 to v1_3: dGPU, common prefix with temperatures first. Temperature in C, power in W.
+METRICS_V1_1 = MetricsFormat(
+    struct.Struct('<4x6H3HHQQ7H7HIH'),
+    (*_TEMPS_V1, *_ACTIVITY_V1, 'average_socket_power', 'energy_accumulator', 'system_clock_counter',
+     *['average_{}_frequency'.format(clk) for clk in _CLOCKS_V1], *['current_{}'.format(clk) for clk in _CLOCKS_V1],
+     'throttle_status', 'current_fan_speed'),
+    1.0, 1.0)
+
+# gpu_metrics_v2_0 to v2_4: APU, common prefix. Temperature in centi-C, power in mW.
+_CLOCKS_V2 = ('gfxclk', 'socclk', 'uclk', 'fclk', 'vclk', 'dclk')
+METRICS_V2_0 = MetricsFormat(
+    struct.Struct('<4x4xQ2H8H2H2H4H8H6H6H'),
+    ('system_clock_counter', 'temperature_gfx', 'temperature_soc', *['temperature_core_{}'.format(i) for i in range(8)],
+     'temperature_l3_0', 'temperature_l3_1', 'average_gfx_activity', 'average_mm_activity',
+     'average_socket_power', 'average_cpu_power', 'average_soc_power', 'average_gfx_power',
+     *['average_core_power_{}'.format(i) for i in range(8)],
+     *['average_{}_frequency'.format(clk) for clk in _CLOCKS_V2], *['current_{}'.format(clk) for clk in _CLOCKS_V2]),
+    100.0, 1000.0)
+
+METRICS_FORMATS: Dict[Tuple[int, int], MetricsFormat] = {
+    (1, 0): METRICS_V1_0, (1, 1): METRICS_V1_1, (1, 2): METRICS_V1_1, (1, 3): METRICS_V1_1,
+    (2, 0): METRICS_V2_0, (2, 1): METRICS_V2_0, (2, 2): METRICS_V2_0, (2, 3): METRICS_V2_0, (2, 4): METRICS_V2_0}
+
+# GpuItem parameter name: {parameter key: metrics field name}, or metrics field name for scalars.
+PARAM_MAP: Dict[int, Dict[str, Union[str, Dict[str, str]]]] = {
+    1: {'temperatures': {'edge': 'temperature_edge', 'junction': 'temperature_hotspot', 'mem': 'temperature_mem'},
+        'frequencies':  {'sclk': 'current_gfxclk', 'mclk': 'current_uclk'},
+        'loading':      'average_gfx_activity',
+        'mem_loading':  'average_umc_activity',
+        'power':        'average_socket_power',
+        'fan_speed':    'current_fan_speed'},
+    2: {'temperatures': {'edge': 'temperature_gfx'},
+        'frequencies':  {'sclk': 'current_gfxclk', 'mclk': 'current_uclk'},
+        'loading':      'average_gfx_activity',
+        'power':        'average_socket_power'}}
+
+
+def get_format(data: Union[bytes, memoryview]) -> Optional[Tuple[int, int]]:
+    """ Get the format and content revision of the given gpu_metrics data if supported.
+
+    :param data: Contents of the gpu_metrics file
+    :return: Tuple of format and content revision or None if not supported.
+    """
+    if len(data) < HEADER.size: return None
+    structure_size, format_revision, content_revision = HEADER.unpack_from(data)
+    metrics_format = METRICS_FORMATS.get((format_revision, content_revision))
+    if not metrics_format:
+        LOGGER.debug('Unsupported gpu_metrics format v%s.%s', format_revision, content_revision)
+        return None
+    if min(structure_size, len(data)) < metrics_format.layout.size:
+        LOGGER.debug('Invalid gpu_metrics v%s.%s size: %s', format_revision, content_revision, len(data))
+        return None
+    return format_revision, content_revision
+
+
+def parse_gpu_metrics(data: Union[bytes, memoryview]) -> Optional[Dict[str, GpuMetricsValue]]:
+    """ Parse gpu_metrics data into GpuItem parameter values in the units used by the hwmon sensors.
+        Values reported as not available by the driver are set to None.
+
+    :param data: Contents of the gpu_metrics file
+    :return: Dictionary of GpuItem parameter name to value, or None if format is not supported.
+    """
+    revision = get_format(data)
+    if not revision: return None
+    metrics_format = METRICS_FORMATS[revision]
+    fields = dict(zip(metrics_format.names, metrics_format.layout.unpack_from(data)))
+
+    def scaled(field_name: str) -> Optional[float]:
+        value = fields[field_name]
+        if value == NA_U16: return None
+        if field_name.startswith('temperature'): return value / metrics_format.temp_scale
+        if field_name.endswith('power'): return value / metrics_format.power_scale
+        return float(value)
+
+    values: Dict[str, GpuMetricsValue] = {}
+    for param_name, field_names in PARAM_MAP[revision[0]].items():
+        if isinstance(field_names, dict):
+            param_dict = {key: scaled(field_name) for key, field_name in field_names.items()}
+            values[param_name] = {key: value for key, value in param_dict.items() if value is not None} or None
+        else:
+            values[param_name] = scaled(field_names)
+    return values
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+""" NVIDIA sensor backends used for repetitive polling of NVIDIA GPUs.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import subprocess
+import threading
+import atexit
+import logging
+import ctypes
+from copy import deepcopy
+from time import monotonic
+from shlex import split as shlex_split
+from typing import Dict, List, Tuple, Optional, Union, Set, Any
+
+LOGGER = logging.getLogger('gpu-utils')
+
+
+def bus_id_key(bus_id: str) -> str:
+    """ Convert a PCIe bus id in lspci or nvidia-smi format to a common key.
+
+    :param bus_id: PCIe bus id as 01:00.0, 0000:01:00.0, or 00000000:01:00.0
+    :return: Bus id with a 4 digit domain in lower case
+    """
+    bus_id_items = bus_id.strip().lower().split(':')
+    try:
+        domain = int(bus_id_items[0], 16) if len(bus_id_items) == 3 else 0
+    except ValueError:
+        return bus_id.strip().lower()
+    return '{:04x}:{}'.format(domain, ':'.join(bus_id_items[-2:]))
+
+
+class NvSmiStream:
+    """ Run a single long-lived nvidia-smi loop query and keep the latest sample for each GPU.  A
+        reader thread parses the output as it is produced and restarts nvidia-smi if it exits.
+    """
+    restart_delay: float = 0.5
+    max_restart_delay: float = 10.0
+
+    def __init__(self, cmd_nvidia_smi: str, query_list: List[str], loop_ms: int = 1000):
+        self.cmd_nvidia_smi = cmd_nvidia_smi
+        self.query_list: List[str] = list(query_list)
+        self.loop_ms: int = max(int(loop_ms), 100)
+        self.samples: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self.restarts: int = 0
+        self.process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._quit = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self) -> str:
+        return 'NvSmiStream(loop_ms={}, fields={}, restarts={})'.format(self.loop_ms, self.query_list, self.restarts)
+
+    @property
+    def cmd_str(self) -> str:
+        """ The nvidia-smi loop query command string.
+        """
+        return '{} --query-gpu=pci.bus_id,{} --format=csv,noheader,nounits --loop-ms={}'.format(
+               self.cmd_nvidia_smi, ','.join(self.query_list), self.loop_ms)
+
+    def is_running(self) -> bool:
+        """ Return True if the reader thread is active.
+        """
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        """ Start the reader thread, which starts nvidia-smi.
+        """
+        if self.is_running(): return
+        self._quit.clear()
+        self._thread = threading.Thread(target=self._run, name='nvidia-smi-stream', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """ Stop the reader thread and terminate nvidia-smi.  The exit handler set by start is removed,
+            so a stopped stream is not kept until exit.
+        """
+        atexit.unregister(self.stop)
+        self._quit.set()
+        process = self.process
+        if process and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def get_sample(self, bus_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, str]]:
+        """ Get the latest sample for the given GPU.
+
+        :param bus_id: PCIe bus id of the target GPU.
+        :param max_age: Max age in seconds of a valid sample.  None for any age.
+        :return: Dictionary of query field name to value, or None if no valid sample.
+        """
+        with self._lock:
+            sample = self.samples.get(bus_id_key(bus_id))
+        if not sample: return None
+        if max_age is not None and monotonic() - sample[0] > max_age: return None
+        return sample[1]
+
+    def parse_line(self, line: str) -> bool:
+        """ Parse a line of nvidia-smi output and save it as the latest sample for its GPU.
+
+        :param line: One line of csv output.
+        :return: True if line was a valid sample.
+        """
+        items = [item.strip() for item in line.split(',')]
+        if len(items) != len(self.query_list) + 1: return False
+        sample = dict(zip(self.query_list, items[1:]))
+        with self._lock:
+            self.samples[bus_id_key(items[0])] = (monotonic(), sample)
+        return True
+
+    def _run(self) -> None:
+        """ Reader thread: run nvidia-smi, parse output, and restart it if it exits.
+        """
+        failures = 0
+        while not self._quit.is_set():
+            LOGGER.debug('NV stream command:\n%s', self.cmd_str)
+            valid_lines = 0
+            try:
+                self.process = subprocess.Popen(shlex_split(self.cmd_str), shell=False, stdout=subprocess.PIPE,
+                                                stderr=subprocess.DEVNULL, universal_newlines=True, bufsize=1)
+                for line in self.process.stdout:
+                    if self.parse_line(line): valid_lines += 1
+                    if self._quit.is_set(): break
+                self.process.stdout.close()
+                return_code = self.process.wait()
+            except OSError as except_err:
+                LOGGER.debug('NV stream error: [%s]', except_err)
+                return_code = None
+            if self._quit.is_set(): break
+            failures = 0 if valid_lines else failures + 1
+            self.restarts += 1
+            delay = min(self.restart_delay * 2 ** min(failures, 5), self.max_restart_delay)
+            LOGGER.debug('NV stream exited [%s] after %s samples, restarting in %ss',
+                         return_code, valid_lines, delay)
+            self._quit.wait(delay)
+
+
+class NvmlError(Exception):
+    """ Error returned by an NVML call.
+    """
+    def __init__(self, function_name: str, return_code: int):
+        super().__init__('{} returned {}'.format(function_name, return_code))
+        self.return_code = return_code
+
+
+class NvmlUtilization(ctypes.Structure):
+    """ nvmlUtilization_t """
+    _fields_ = [('gpu', ctypes.c_uint), ('memory', ctypes.c_uint)]
+
+
+class NvmlMemory(ctypes.Structure):
+    """ nvmlMemory_t """
+    _fields_ = [('total', ctypes.c_ulonglong), ('free', ctypes.c_ulonglong), ('used', ctypes.c_ulonglong)]
+
+
+class NvmlLibrary:
+    """ Thin ctypes interface to the functions of libnvidia-ml used by NvmlBackend.  Values are returned
+        in NVML units.  NvmlShim implements the same interface for use without NVIDIA hardware.
+    """
+    lib_names: Tuple[str, ...] = ('libnvidia-ml.so.1', 'libnvidia-ml.so')
+    NVML_SUCCESS: int = 0
+    NVML_TEMPERATURE_GPU: int = 0
+    NVML_CLOCK_GRAPHICS: int = 0
+    NVML_CLOCK_SM: int = 1
+    NVML_CLOCK_MEM: int = 2
+    NVML_CLOCK_VIDEO: int = 3
+    # nvmlGpuOperationMode_t values and their nvidia-smi gom.current names.
+    gom_names: Dict[int, str] = {0: 'All On', 1: 'Compute', 2: 'Low Double Precision'}
+
+    def __init__(self, lib_name: Optional[str] = None):
+        self.lib: Optional[ctypes.CDLL] = None
+        for try_lib_name in (lib_name, ) if lib_name else self.lib_names:
+            try:
+                self.lib = ctypes.CDLL(try_lib_name)
+                break
+            except OSError as except_err:
+                LOGGER.debug('Can not load NVML library [%s]: %s', try_lib_name, except_err)
+        if not self.lib:
+            raise OSError('NVML library not found')
+        self._call('nvmlInit_v2')
+
+    def _call(self, function_name: str, *args) -> None:
+        return_code = getattr(self.lib, function_name)(*args)
+        if return_code != self.NVML_SUCCESS:
+            raise NvmlError(function_name, return_code)
+
+    def _get_uint(self, function_name: str, handle: ctypes.c_void_p, *args) -> int:
+        value = ctypes.c_uint()
+        self._call(function_name, handle, *args, ctypes.byref(value))
+        return value.value
+
+    def shutdown(self) -> None:
+        """ Release NVML resources. """
+        self._call('nvmlShutdown')
+
+    def device_handle(self, bus_id: str) -> ctypes.c_void_p:
+        """ Get the device handle for the GPU with the given PCIe bus id. """
+        handle = ctypes.c_void_p()
+        self._call('nvmlDeviceGetHandleByPciBusId_v2', bus_id.encode(), ctypes.byref(handle))
+        return handle
+
+    def power_usage(self, handle: ctypes.c_void_p) -> int:
+        """ Power draw in mW. """
+        return self._get_uint('nvmlDeviceGetPowerUsage', handle)
+
+    def power_limit(self, handle: ctypes.c_void_p) -> int:
+        """ Enforced power limit in mW. """
+        return self._get_uint('nvmlDeviceGetEnforcedPowerLimit', handle)
+
+    def temperature(self, handle: ctypes.c_void_p) -> int:
+        """ GPU temperature in C. """
+        return self._get_uint('nvmlDeviceGetTemperature', handle, self.NVML_TEMPERATURE_GPU)
+
+    def clock(self, handle: ctypes.c_void_p, clock_type: int) -> int:
+        """ Current clock of the given type in MHz. """
+        return self._get_uint('nvmlDeviceGetClockInfo', handle, clock_type)
+
+    def utilization(self, handle: ctypes.c_void_p) -> Tuple[int, int]:
+        """ GPU and memory utilization in percent. """
+        utilization = NvmlUtilization()
+        self._call('nvmlDeviceGetUtilizationRates', handle, ctypes.byref(utilization))
+        return utilization.gpu, utilization.memory
+
+    def memory_used(self, handle: ctypes.c_void_p) -> int:
+        """ Used vram in bytes. """
+        memory = NvmlMemory()
+        self._call('nvmlDeviceGetMemoryInfo', handle, ctypes.byref(memory))
+        return memory.used
+
+    def fan_speed(self, handle: ctypes.c_void_p) -> int:
+        """ Fan speed in percent. """
+        return self._get_uint('nvmlDeviceGetFanSpeed', handle)
+
+    def performance_state(self, handle: ctypes.c_void_p) -> int:
+        """ Current p-state number. """
+        return self._get_uint('nvmlDeviceGetPerformanceState', handle)
+
+    def gpu_operation_mode(self, handle: ctypes.c_void_p) -> int:
+        """ Current GPU operation mode number. """
+        current, pending = ctypes.c_uint(), ctypes.c_uint()
+        self._call('nvmlDeviceGetGpuOperationMode', handle, ctypes.byref(current), ctypes.byref(pending))
+        return current.value
+
+
+class NvmlShim:
+    """ Python stand-in for NvmlLibrary, used to test and benchmark NvmlBackend without NVIDIA hardware.
+        Values are set per bus id in NVML units.  Set a value to an NvmlError to simulate an
+        unsupported sensor.
+    """
+    default_values: Dict[str, Any] = {'power_usage': 85000, 'power_limit': 250000, 'temperature': 61,
+                                      'clock': {0: 1800, 1: 1800, 2: 7000, 3: 1500},
+                                      'utilization': (44, 12), 'memory_used': 2 * 1024 ** 3,
+                                      'fan_speed': 35, 'performance_state': 2, 'gpu_operation_mode': 0}
+
+    def __init__(self, bus_ids: List[str]):
+        self.values: Dict[str, Dict[str, Any]] = {bus_id_key(bus_id): deepcopy(self.default_values) for bus_id in bus_ids}
+        self.call_count: int = 0
+
+    def _get(self, handle: str, name: str) -> Any:
+        self.call_count += 1
+        value = self.values[handle][name]
+        if isinstance(value, NvmlError): raise value
+        return value
+
+    def shutdown(self) -> None:
+        """ Release NVML resources. """
+
+    def device_handle(self, bus_id: str) -> str:
+        """ Get the device handle for the GPU with the given PCIe bus id. """
+        if bus_id_key(bus_id) not in self.values: raise NvmlError('nvmlDeviceGetHandleByPciBusId_v2', 13)
+        return bus_id_key(bus_id)
+
+    def power_usage(self, handle: str) -> int:
+        """ Power draw in mW. """
+        return self._get(handle, 'power_usage')
+
+    def power_limit(self, handle: str) -> int:
+        """ Enforced power limit in mW. """
+        return self._get(handle, 'power_limit')
+
+    def temperature(self, handle: str) -> int:
+        """ GPU temperature in C. """
+        return self._get(handle, 'temperature')
+
+    def clock(self, handle: str, clock_type: int) -> int:
+        """ Current clock of the given type in MHz. """
+        return self._get(handle, 'clock')[clock_type]
+
+    def utilization(self, handle: str) -> Tuple[int, int]:
+        """ GPU and memory utilization in percent. """
+        return self._get(handle, 'utilization')
+
+    def memory_used(self, handle: str) -> int:
+        """ Used vram in bytes. """
+        return self._get(handle, 'memory_used')
+
+    def fan_speed(self, handle: str) -> int:
+        """ Fan speed in percent. """
+        return self._get(handle, 'fan_speed')
+
+    def performance_state(self, handle: str) -> int:
+        """ Current p-state number. """
+        return self._get(handle, 'performance_state')
+
+    def gpu_operation_mode(self, handle: str) -> int:
+        """ Current GPU operation mode number. """
+        return self._get(handle, 'gpu_operation_mode')
+
+
+class NvmlBackend:
+    """ Read NVIDIA Monitor sensors directly from NVML.  Results are keyed by nvidia-smi query field
+        name and converted to nvidia-smi units, but returned as numbers instead of text.  The GPU
+        operation mode is returned as its nvidia-smi name.  A sensor which is not supported by a GPU
+        is not read again.
+    """
+    def __init__(self, lib: Union[NvmlLibrary, NvmlShim, None] = None):
+        self.lib: Union[NvmlLibrary, NvmlShim] = lib if lib else NvmlLibrary()
+        self.handles: Dict[str, Any] = {}
+        self.unsupported: Dict[str, Set[str]] = {}
+        self.readers = {'power.draw':         lambda h: self.lib.power_usage(h) / 1000.0,
+                        'power.limit':        lambda h: self.lib.power_limit(h) / 1000.0,
+                        'temperature.gpu':    lambda h: float(self.lib.temperature(h)),
+                        'clocks.gr':          lambda h: float(self.lib.clock(h, NvmlLibrary.NVML_CLOCK_GRAPHICS)),
+                        'clocks.sm':          lambda h: float(self.lib.clock(h, NvmlLibrary.NVML_CLOCK_SM)),
+                        'clocks.mem':         lambda h: float(self.lib.clock(h, NvmlLibrary.NVML_CLOCK_MEM)),
+                        'clocks.video':       lambda h: float(self.lib.clock(h, NvmlLibrary.NVML_CLOCK_VIDEO)),
+                        'utilization.gpu':    lambda h: float(self.lib.utilization(h)[0]),
+                        'utilization.memory': lambda h: float(self.lib.utilization(h)[1]),
+                        'memory.used':        lambda h: self.lib.memory_used(h) / 1024.0 ** 2,
+                        'fan.speed':          lambda h: float(self.lib.fan_speed(h)),
+                        'pstate':             self.lib.performance_state,
+                        'gom.current':        lambda h: self.gom_name(self.lib.gpu_operation_mode(h))}
+
+    @staticmethod
+    def gom_name(gom_num: int) -> str:
+        """ Get the nvidia-smi name of a GPU operation mode number.
+
+        :param gom_num: nvmlGpuOperationMode_t value
+        :return: The mode name, or the number as text for an unknown mode.
+        """
+        return NvmlLibrary.gom_names.get(gom_num, str(gom_num))
+
+    @classmethod
+    def create(cls, lib_name: Optional[str] = None) -> Optional['NvmlBackend']:
+        """ Create an NVML backend if the library can be loaded and initialized.
+
+        :param lib_name: Optional library name or path.
+        :return: The backend or None if NVML is not available.
+        """
+        try:
+            return cls(NvmlLibrary(lib_name))
+        except (OSError, NvmlError, AttributeError) as except_err:
+            LOGGER.debug('NVML not available: %s', except_err)
+            return None
+
+    def shutdown(self) -> None:
+        """ Release NVML resources. """
+        try:
+            self.lib.shutdown()
+        except NvmlError as except_err:
+            LOGGER.debug('NVML shutdown error: %s', except_err)
+
+    def read(self, bus_id: str, query_list: List[str]) -> Optional[Dict[str, Union[int, float, None]]]:
+        """ Read the given nvidia-smi query fields for a GPU.
+
+        :param bus_id: PCIe bus id of the target GPU.
+        :param query_list: List of nvidia-smi query field names.  Fields without an NVML reader are ignored.
+        :return: Dictionary of field name to value, None for unsupported fields, or None if the GPU can
+            not be read.
+        """
+        key = bus_id_key(bus_id)
+        handle = self.handles.get(key)
+        if handle is None:
+            try:
+                handle = self.handles[key] = self.lib.device_handle(key)
+            except NvmlError as except_err:
+                LOGGER.debug('NVML can not get handle for [%s]: %s', key, except_err)
+                return None
+            self.unsupported[key] = set()
+        unsupported = self.unsupported[key]
+        results: Dict[str, Union[int, float, None]] = {}
+        for item in query_list:
+            if item not in self.readers: continue
+            if item in unsupported:
+                results[item] = None
+                continue
+            try:
+                results[item] = self.readers[item](handle)
+            except NvmlError as except_err:
+                LOGGER.debug('NVML can not read [%s] for [%s]: %s', item, key, except_err)
+                unsupported.add(item)
+                results[item] = None
+        return results
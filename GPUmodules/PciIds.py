@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+""" Indexed lookup of vendor, device, and subsystem names from the system pci.ids file.  An index of
+    the byte range of each vendor block is built once and cached on disk, keyed by the size and
+    modification time of pci.ids.  Only the blocks of vendors that are looked up are read and parsed.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import os
+import json
+import logging
+from typing import Dict, List, Tuple, Optional
+
+LOGGER = logging.getLogger('gpu-utils')
+
+INDEX_VERSION = 1
+VendorBlock = Dict[str, Tuple[str, Dict[str, str]]]
+
+
+class PciIds:
+    """ Vendor, device, and subsystem names from a pci.ids file.
+    """
+    index_file_name: str = 'pci.ids.index.json'
+
+    def __init__(self, pciid_path: str, cache_dir: Optional[str] = None):
+        self.pciid_path = pciid_path
+        self.cache_dir = cache_dir
+        self.vendor_index: Dict[str, List[int]] = {}
+        self.vendor_names: Dict[str, str] = {}
+        self._vendor_blocks: Dict[str, VendorBlock] = {}
+        file_stat = os.stat(pciid_path)
+        self.file_key: Dict[str, int] = {'version': INDEX_VERSION, 'size': file_stat.st_size,
+                                         'mtime_ns': file_stat.st_mtime_ns}
+        if not self.read_index():
+            self.build_index()
+            self.write_index()
+
+    def __repr__(self) -> str:
+        return 'PciIds({}, vendors={})'.format(self.pciid_path, len(self.vendor_index))
+
+    @property
+    def index_path(self) -> Optional[str]:
+        """ Path of the cached index file.
+        """
+        return os.path.join(self.cache_dir, self.index_file_name) if self.cache_dir else None
+
+    def read_index(self) -> bool:
+        """ Read the cached index if it matches the current pci.ids file.
+
+        :return: True if a valid index was read.
+        """
+        if not self.index_path or not os.path.isfile(self.index_path): return False
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as index_file_ptr:
+                index_data = json.load(index_file_ptr)
+        except (OSError, ValueError) as except_err:
+            LOGGER.debug('Can not read pci.ids index [%s]: %s', self.index_path, except_err)
+            return False
+        if index_data.get('path') != self.pciid_path or index_data.get('key') != self.file_key:
+            LOGGER.debug('pci.ids index [%s] is out of date', self.index_path)
+            return False
+        self.vendor_index = index_data['vendors']
+        self.vendor_names = index_data['names']
+        LOGGER.debug('Read pci.ids index [%s] with %s vendors', self.index_path, len(self.vendor_index))
+        return True
+
+    def write_index(self) -> None:
+        """ Write the index to the cache directory.  Failure to write is not an error.
+        """
+        if not self.index_path: return
+        tmp_path = '{}.{}.tmp'.format(self.index_path, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as index_file_ptr:
+                json.dump({'path': self.pciid_path, 'key': self.file_key,
+                           'vendors': self.vendor_index, 'names': self.vendor_names}, index_file_ptr)
+            os.replace(tmp_path, self.index_path)
+        except OSError as except_err:
+            LOGGER.debug('Can not write pci.ids index [%s]: %s', self.index_path, except_err)
+
+    def build_index(self) -> None:
+        """ Build the index of the byte range of each vendor block in pci.ids.
+        """
+        self.vendor_index = {}
+        self.vendor_names = {}
+        last_vendor: Optional[str] = None
+        offset = 0
+        with open(self.pciid_path, 'rb') as pci_id_file_ptr:
+            for line in pci_id_file_ptr:
+                if line[:1] not in (b'\t', b'#', b'\n', b'\r') and len(line) > 4:
+                    if last_vendor: self.vendor_index[last_vendor][1] = offset
+                    # Device class section follows all vendors
+                    if line.startswith(b'C '):
+                        last_vendor = None
+                        break
+                    last_vendor = line[:4].decode('ascii', errors='replace').lower()
+                    self.vendor_names[last_vendor] = line[4:].decode('utf-8', errors='replace').strip()
+                    self.vendor_index[last_vendor] = [offset + len(line), offset + len(line)]
+                offset += len(line)
+        if last_vendor: self.vendor_index[last_vendor][1] = offset
+        LOGGER.debug('Built pci.ids index with %s vendors', len(self.vendor_index))
+
+    def vendor_block(self, vendor_id: str) -> VendorBlock:
+        """ Get the devices and subsystems of the given vendor, reading its block on first use.
+
+        :param vendor_id: Vendor id as 4 hex digits.
+        :return: Dictionary of device id to device name and dictionary of subsystem id to name.
+        """
+        vendor_id = vendor_id.replace('0x', '').lower()
+        if vendor_id in self._vendor_blocks: return self._vendor_blocks[vendor_id]
+        block: VendorBlock = {}
+        if vendor_id in self.vendor_index:
+            start, end = self.vendor_index[vendor_id]
+            with open(self.pciid_path, 'rb') as pci_id_file_ptr:
+                pci_id_file_ptr.seek(start)
+                block_lines = pci_id_file_ptr.read(end - start).decode('utf-8', errors='replace').splitlines()
+            device_subsystems: Optional[Dict[str, str]] = None
+            for line in block_lines:
+                line = line.rstrip()
+                if len(line) < 5 or line[0] == '#': continue
+                if line[1] != '\t':
+                    device_subsystems = {}
+                    block[line[1:5].lower()] = (line[5:].strip(), device_subsystems)
+                elif device_subsystems is not None and len(line) > 11:
+                    device_subsystems[line[2:11].lower()] = line[11:].strip()
+        self._vendor_blocks[vendor_id] = block
+        return block
+
+    def vendor_name(self, vendor_id: str) -> str:
+        """ Get the vendor name.
+
+        :param vendor_id: Vendor id as 4 hex digits.
+        :return: The name or empty string if not found.
+        """
+        return self.vendor_names.get(vendor_id.replace('0x', '').lower(), '')
+
+    def device_name(self, vendor_id: str, device_id: str) -> str:
+        """ Get the device name.
+
+        :param vendor_id: Vendor id as 4 hex digits.
+        :param device_id: Device id as 4 hex digits.
+        :return: The name or empty string if not found.
+        """
+        device = self.vendor_block(vendor_id).get(device_id.replace('0x', '').lower())
+        return device[0] if device else ''
+
+    def subsystem_name(self, vendor_id: str, device_id: str, subsystem_vendor: str, subsystem_device: str) -> str:
+        """ Get the subsystem name.
+
+        :param vendor_id: Vendor id as 4 hex digits.
+        :param device_id: Device id as 4 hex digits.
+        :param subsystem_vendor: Subsystem vendor id as 4 hex digits.
+        :param subsystem_device: Subsystem device id as 4 hex digits.
+        :return: The name or empty string if not found.
+        """
+        device = self.vendor_block(vendor_id).get(device_id.replace('0x', '').lower())
+        if not device: return ''
+        return device[1].get('{} {}'.format(subsystem_vendor.replace('0x', ''),
+                                            subsystem_device.replace('0x', '')).lower(), '')
+
+
+_PCI_IDS: Dict[str, PciIds] = {}
+
+
+def get_pci_ids(pciid_path: str, cache_dir: Optional[str] = None) -> Optional[PciIds]:
+    """ Get the PciIds object for the given pci.ids file, creating it on first use.
+
+    :param pciid_path: Path of the pci.ids file.
+    :param cache_dir: Directory for the cached index.
+    :return: The PciIds object or None if the file can not be read.
+    """
+    if pciid_path not in _PCI_IDS:
+        try:
+            _PCI_IDS[pciid_path] = PciIds(pciid_path, cache_dir)
+        except OSError as except_err:
+            LOGGER.debug('Can not read pci.ids file [%s]: %s', pciid_path, except_err)
+            return None
+    return _PCI_IDS[pciid_path]
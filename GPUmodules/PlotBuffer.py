@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+""" Fixed length history of plot data for each card, stored in preallocated numpy ring buffers.
+    Each sample is written at its ring position and again at that position plus the history
+    length, so the most recent samples are always a contiguous slice of the arrays.  Appends
+    are O(1) and plots read views of the arrays without copying.  The min and max of each field
+    are updated as samples are added and only rescanned when an extreme value leaves the buffer.
+    This module requires numpy, so it is only imported by gpu-plot.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import logging
+import warnings
+from datetime import datetime
+from typing import Dict, List, Tuple, Sequence, Any, Optional
+
+import numpy as np
+
+from GPUmodules.env import GUT_CONST
+from GPUmodules.Sampling import sample_value
+
+LOGGER = logging.getLogger('gpu-utils')
+
+
+def parse_plot_time(time_str: str) -> Optional[datetime]:
+    """ Convert the Time field of plot data to a datetime.  Both the full second and the
+        microsecond time formats are accepted.
+
+    :param time_str: Time as written by GpuList.print_plot
+    :return: The datetime or None if the string is not a valid time.
+    """
+    for time_format in (GUT_CONST.TIME_FORMAT_MS, GUT_CONST.TIME_FORMAT):
+        try:
+            return datetime.strptime(time_str.strip(), time_format)
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+class PlotRingBuffer:
+    """ Ring buffer of numeric plot fields for each card, with the latest raw values of all fields
+        kept for display of text items.  Cards are added on first use.
+    """
+    def __init__(self, fields: Sequence[str], length: int):
+        self.length = length
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.field_index: Dict[str, int] = {field: index for index, field in enumerate(self.fields)}
+        self.card_index: Dict[int, int] = {}
+        self.values = np.full((0, len(self.fields), 2 * length), np.nan)
+        self.times = np.full((0, 2 * length), np.datetime64('NaT'), dtype='datetime64[us]')
+        self.field_min = np.full((0, len(self.fields)), np.nan)
+        self.field_max = np.full((0, len(self.fields)), np.nan)
+        self.range_stale = np.zeros((0, len(self.fields)), dtype=bool)
+        self.cursor: List[int] = []
+        self.count: List[int] = []
+        self.latest: Dict[int, Dict[str, Any]] = {}
+
+    def __repr__(self) -> str:
+        return 'PlotRingBuffer(cards={}, fields={}, length={}, samples={})'.format(
+            list(self.card_index), self.fields, self.length, self.num_samples())
+
+    def card_nums(self) -> List[int]:
+        """ Get the card numbers in the order they were added.
+
+        :return: List of card numbers
+        """
+        return list(self.card_index)
+
+    def num_samples(self) -> int:
+        """ Get the total number of samples in the buffer for all cards.
+
+        :return: Number of samples
+        """
+        return sum(self.count)
+
+    def add_card(self, card_num: int) -> int:
+        """ Allocate the buffers for a new card.
+
+        :param card_num: Card number
+        :return: Index of the card in the buffers
+        """
+        index = len(self.card_index)
+        self.card_index[card_num] = index
+        self.values = np.concatenate((self.values, np.full((1,) + self.values.shape[1:], np.nan)))
+        self.times = np.concatenate((self.times, np.full((1,) + self.times.shape[1:], np.datetime64('NaT'),
+                                                         dtype=self.times.dtype)))
+        self.field_min = np.concatenate((self.field_min, np.full((1, len(self.fields)), np.nan)))
+        self.field_max = np.concatenate((self.field_max, np.full((1, len(self.fields)), np.nan)))
+        self.range_stale = np.concatenate((self.range_stale, np.zeros((1, len(self.fields)), dtype=bool)))
+        self.cursor.append(0)
+        self.count.append(0)
+        self.latest[card_num] = {}
+        LOGGER.debug('Added card %s to plot buffer', card_num)
+        return index
+
+    def append(self, card_num: int, time_val: Optional[datetime], plot_values: Dict[str, Any]) -> None:
+        """ Add a sample for the given card, replacing the oldest sample when the buffer is full.
+
+        :param card_num: Card number
+        :param time_val: Time of the sample
+        :param plot_values: Dictionary of field name to value for the sample
+        """
+        index = self.card_index.get(card_num)
+        if index is None: index = self.add_card(card_num)
+        position = self.cursor[index]
+        mirror = position + self.length
+        time64 = np.datetime64(time_val.replace(tzinfo=None), 'us') if time_val else np.datetime64('NaT')
+        self.times[index, position] = self.times[index, mirror] = time64
+        sample = np.array([sample_value(plot_values.get(field)) for field in self.fields])
+        card_values = self.values[index]
+        if self.count[index] == self.length:
+            # The range must be rescanned if the replaced sample was an extreme value.
+            replaced = card_values[:, position]
+            self.range_stale[index] |= (replaced <= self.field_min[index]) | (replaced >= self.field_max[index])
+        card_values[:, position] = card_values[:, mirror] = sample
+        self.field_min[index] = np.fmin(self.field_min[index], sample)
+        self.field_max[index] = np.fmax(self.field_max[index], sample)
+        self.cursor[index] = (position + 1) % self.length
+        self.count[index] = min(self.count[index] + 1, self.length)
+        self.latest[card_num] = plot_values
+
+    def _window(self, index: int) -> slice:
+        """ Get the slice of the mirrored arrays holding the samples of a card in time order.
+
+        :param index: Index of the card in the buffers
+        :return: Slice of the samples
+        """
+        end = self.cursor[index] + self.length
+        return slice(end - self.count[index], end)
+
+    def time_series(self, card_num: int) -> np.ndarray:
+        """ Get a view of the sample times for the given card, oldest first.
+
+        :param card_num: Card number
+        :return: Array view of sample times
+        """
+        index = self.card_index[card_num]
+        return self.times[index, self._window(index)]
+
+    def series(self, card_num: int, field: str) -> np.ndarray:
+        """ Get a view of the values of a field for the given card, oldest first.
+
+        :param card_num: Card number
+        :param field: Plot field name
+        :return: Array view of field values
+        """
+        index = self.card_index[card_num]
+        return self.values[index, self.field_index[field], self._window(index)]
+
+    def field_matrix(self, field: str) -> np.ndarray:
+        """ Get the values of a field for all cards as a cards by samples array, oldest first.  Cards
+            with fewer samples than the history length are padded with nan at the start.
+
+        :param field: Plot field name
+        :return: Array of field values with a row for each card
+        """
+        positions = np.asarray(self.cursor)[:, np.newaxis] + np.arange(self.length)
+        return self.values[np.arange(len(self.cursor))[:, np.newaxis], self.field_index[field], positions]
+
+    def last_value(self, card_num: int, field: str) -> float:
+        """ Get the most recent numeric value of a field for the given card.
+
+        :param card_num: Card number
+        :param field: Plot field name
+        :return: The value or nan if no samples
+        """
+        index = self.card_index[card_num]
+        return float(self.values[index, self.field_index[field], self.cursor[index] + self.length - 1])
+
+    def latest_value(self, card_num: int, field: str) -> Any:
+        """ Get the most recent raw value of any field for the given card.
+
+        :param card_num: Card number
+        :param field: Plot data field name
+        :return: The raw value or None if not available
+        """
+        return self.latest.get(card_num, {}).get(field)
+
+    def update_range(self) -> None:
+        """ Rescan the samples of fields where an extreme value was replaced.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for index, field_index in zip(*np.nonzero(self.range_stale)):
+                field_values = self.values[index, field_index, :self.length]
+                self.field_min[index, field_index] = np.nanmin(field_values)
+                self.field_max[index, field_index] = np.nanmax(field_values)
+        self.range_stale[:] = False
+
+    def field_range(self, fields: Sequence[str], card_num: Optional[int] = None) -> Tuple[float, float]:
+        """ Get the minimum and maximum of the given fields over the samples in the buffer.
+            Unwritten and unsupported values are nan and are ignored.
+
+        :param fields: Plot field names
+        :param card_num: Card number or None for all cards
+        :return: Tuple of min and max, which are nan if there are no valid values.
+        """
+        if not fields or not self.card_index: return np.nan, np.nan
+        if self.range_stale.any(): self.update_range()
+        field_indices = [self.field_index[field] for field in fields]
+        cards = slice(None) if card_num is None else self.card_index[card_num]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            return (float(np.nanmin(self.field_min[cards, field_indices])),
+                    float(np.nanmax(self.field_max[cards, field_indices])))
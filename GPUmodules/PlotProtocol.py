@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+""" Binary stream format for plot data sent from gpu-mon to gpu-plot.  The stream starts with a
+    versioned header that defines the name and type of each field.  It is followed by one frame
+    for each poll, which holds a sequence number, the time of the poll, and a record for each GPU
+    with its numeric fields packed as float64 values and its text fields as length prefixed
+    UTF-8 strings.  All values are little endian.
+
+    Stream header:  magic(4s) version(H) num_fields(H), then for each field: type(c) name_len(B) name
+    Frame:          record_bytes(I) sequence(Q) time(d) num_gpus(H), then for each GPU:
+                    card_num(i) numeric values(d...), then for each text field: len(H) text
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import struct
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple, Sequence, Any, Optional, NamedTuple, BinaryIO
+
+from GPUmodules.Sampling import sample_value
+
+LOGGER = logging.getLogger('gpu-utils')
+
+PROTOCOL_MAGIC = b'GUTP'
+PROTOCOL_VERSION = 1
+NUMERIC_TYPE = b'd'
+TEXT_TYPE = b's'
+# Plot fields sent as text.  All other fields are sent as float64 values.
+TEXT_FIELDS = ('model_display', 'ppm')
+
+STREAM_HEADER = struct.Struct('<4sHH')
+FIELD_HEADER = struct.Struct('<cB')
+FRAME_HEADER = struct.Struct('<IQdH')
+TEXT_LENGTH = struct.Struct('<H')
+# Times are sent as seconds from this naive epoch, so local and UTC times are kept as is.
+TIME_EPOCH = datetime(1970, 1, 1)
+
+
+class PlotFrame(NamedTuple):
+    """ Plot data of all GPUs for one poll.
+    """
+    sequence: int
+    time: datetime
+    gpus: List[Tuple[int, Dict[str, Any]]]
+
+
+def is_plot_stream(file_ptr: BinaryIO) -> bool:
+    """ Check if the given input starts with a binary plot stream header, without consuming it.
+
+    :param file_ptr: Buffered binary input, such as sys.stdin.buffer
+    :return: True if the input is a binary plot stream.
+    """
+    try:
+        return file_ptr.peek(len(PROTOCOL_MAGIC))[:len(PROTOCOL_MAGIC)] == PROTOCOL_MAGIC
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+class PlotStreamCodec:
+    """ Field definitions and record structure shared by the stream writer and reader.
+    """
+    def __init__(self, field_types: Sequence[Tuple[str, bytes]]):
+        self.field_types: Tuple[Tuple[str, bytes], ...] = tuple(field_types)
+        self.numeric_fields: Tuple[str, ...] = tuple(name for name, field_type in self.field_types
+                                                     if field_type == NUMERIC_TYPE)
+        self.text_fields: Tuple[str, ...] = tuple(name for name, field_type in self.field_types
+                                                  if field_type == TEXT_TYPE)
+        self.record = struct.Struct('<i{}d'.format(len(self.numeric_fields)))
+
+    def __repr__(self) -> str:
+        return '{}(numeric={}, text={})'.format(type(self).__name__, self.numeric_fields, self.text_fields)
+
+
+class PlotStreamWriter(PlotStreamCodec):
+    """ Encode the header and frames of a binary plot stream.
+    """
+    def __init__(self, fields: Sequence[str]):
+        super().__init__([(field, TEXT_TYPE if field in TEXT_FIELDS else NUMERIC_TYPE) for field in fields])
+        self.sequence: int = 0
+
+    def header_bytes(self) -> bytes:
+        """ Encode the stream header.
+
+        :return: The stream header
+        """
+        header_items = [STREAM_HEADER.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION, len(self.field_types))]
+        for name, field_type in self.field_types:
+            name_bytes = name.encode('utf-8')
+            header_items.append(FIELD_HEADER.pack(field_type, len(name_bytes)))
+            header_items.append(name_bytes)
+        return b''.join(header_items)
+
+    def frame_bytes(self, time_val: datetime, gpus: Sequence[Tuple[int, Dict[str, Any]]]) -> bytes:
+        """ Encode a frame with the values of all GPUs for one poll.
+
+        :param time_val: Time of the poll
+        :param gpus: List of card number and dictionary of field name to value
+        :return: The frame
+        """
+        records = []
+        for card_num, values in gpus:
+            records.append(self.record.pack(card_num, *[sample_value(values.get(field))
+                                                        for field in self.numeric_fields]))
+            for field in self.text_fields:
+                value = values.get(field)
+                text_bytes = ('' if value is None else str(value).strip()).encode('utf-8')[:0xFFFF]
+                records.append(TEXT_LENGTH.pack(len(text_bytes)))
+                records.append(text_bytes)
+        record_bytes = b''.join(records)
+        self.sequence += 1
+        return FRAME_HEADER.pack(len(record_bytes), self.sequence,
+                                 (time_val.replace(tzinfo=None) - TIME_EPOCH).total_seconds(),
+                                 len(gpus)) + record_bytes
+
+
+class PlotStreamReader(PlotStreamCodec):
+    """ Decode a binary plot stream.  The stream header is read when the reader is created.
+    """
+    def __init__(self, file_ptr: BinaryIO):
+        self.file_ptr = file_ptr
+        self.sequence: int = 0
+        self.dropped: int = 0
+        super().__init__(self.read_header())
+
+    def _read(self, size: int) -> bytes:
+        """ Read the given number of bytes from the stream.
+
+        :param size: Number of bytes
+        :return: The bytes read
+        """
+        data = self.file_ptr.read(size)
+        if len(data) < size: raise EOFError('End of plot stream')
+        return data
+
+    def read_header(self) -> List[Tuple[str, bytes]]:
+        """ Read the stream header.
+
+        :return: List of field name and type
+        """
+        magic, version, num_fields = STREAM_HEADER.unpack(self._read(STREAM_HEADER.size))
+        if magic != PROTOCOL_MAGIC:
+            raise ValueError('Invalid plot stream header: {}'.format(magic))
+        if version != PROTOCOL_VERSION:
+            raise ValueError('Unsupported plot stream version {}, expected {}'.format(version, PROTOCOL_VERSION))
+        field_types = []
+        for _ in range(num_fields):
+            field_type, name_length = FIELD_HEADER.unpack(self._read(FIELD_HEADER.size))
+            if field_type not in (NUMERIC_TYPE, TEXT_TYPE):
+                raise ValueError('Invalid plot stream field type: {}'.format(field_type))
+            field_types.append((self._read(name_length).decode('utf-8'), field_type))
+        LOGGER.debug('Plot stream version %s with fields: %s', version, field_types)
+        return field_types
+
+    def read_frame(self) -> Optional[PlotFrame]:
+        """ Read the next frame from the stream.
+
+        :return: The frame or None at the end of the stream
+        """
+        try:
+            record_length, sequence, time_val, num_gpus = FRAME_HEADER.unpack(self._read(FRAME_HEADER.size))
+            record_bytes = self._read(record_length)
+        except EOFError:
+            return None
+        if self.sequence and sequence != self.sequence + 1:
+            self.dropped += max(0, sequence - self.sequence - 1)
+            LOGGER.debug('Plot stream sequence %s follows %s, %s frames dropped', sequence, self.sequence,
+                         self.dropped)
+        self.sequence = sequence
+
+        gpus = []
+        offset = 0
+        for _ in range(num_gpus):
+            record = self.record.unpack_from(record_bytes, offset)
+            offset += self.record.size
+            values: Dict[str, Any] = dict(zip(self.numeric_fields, record[1:]))
+            for field in self.text_fields:
+                text_length, = TEXT_LENGTH.unpack_from(record_bytes, offset)
+                offset += TEXT_LENGTH.size
+                values[field] = record_bytes[offset:offset + text_length].decode('utf-8', errors='replace')
+                offset += text_length
+            gpus.append((record[0], values))
+        return PlotFrame(sequence, TIME_EPOCH + timedelta(seconds=time_val), gpus)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+""" Sample timing and per sensor refresh scheduling for repetitive polling of driver files.  Samples
+    are aligned to fixed deadlines on the monotonic clock, so the sample period does not drift by the
+    time taken to read.  Each sensor parameter has a refresh period in monitor ticks.  Fast moving
+    sensors are read on every tick, while slow moving sensors are read less often.  In adaptive mode,
+    the period of a sensor is increased while its value does not change and is reset to its minimum
+    when a change is detected.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import re
+import logging
+from math import inf, floor, nan
+from time import monotonic, sleep
+from datetime import datetime
+from typing import Dict, Tuple, Union, Any, Optional, NamedTuple, Mapping
+
+from GPUmodules.env import GUT_CONST
+from GPUmodules.RegexPatterns import PatternKeys as PK
+
+LOGGER = logging.getLogger('gpu-utils')
+PATTERNS = GUT_CONST.PATTERNS
+
+# Parameter name: (min period, max period) in monitor ticks.  Parameters not listed are read every tick.
+SENSOR_PERIODS: Dict[str, Tuple[int, int]] = {
+    'power':           (1, 1),
+    'temperatures':    (1, 1),
+    'frequencies':     (1, 1),
+    'voltages':        (1, 1),
+    'loading':         (1, 1),
+    'mem_loading':     (1, 1),
+    'sclk_ps':         (1, 1),
+    'mclk_ps':         (1, 4),
+    'fan_pwm':         (1, 4),
+    'mem_vram_used':   (1, 4),
+    'mem_gtt_used':    (1, 4),
+    'power_cap':       (5, 30),
+    'ppm':             (5, 30),
+    'power_cap_range': (0, 0),
+    'temp_crits':      (0, 0),
+    'fan_speed_range': (0, 0),
+    'fan_pwm_range':   (0, 0),
+    'vbios':           (0, 0),
+    'unique_id':       (0, 0),
+    'mem_vram_total':  (0, 0),
+    'mem_gtt_total':   (0, 0)}
+
+
+def sample_value(value: Any) -> float:
+    """ Convert a parameter value to a float sample.
+
+    :param value: Value from GpuItem.get_params_value
+    :return: The value as a float, or nan if not numeric.
+    """
+    if isinstance(value, str): value = re.sub(PATTERNS[PK.MHz], '', value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return nan
+
+
+class GpuSnapshot(NamedTuple):
+    """ Immutable result of one poll of a GPU.  All values share the time stamps of the poll, which
+        are the same for all GPUs read in the poll.
+    """
+    card_num: Optional[int]
+    mono_time: float
+    wall_time: datetime
+    read_duration: float
+    values: Mapping[str, Any]
+
+
+class AggregateValue(NamedTuple):
+    """ Statistics of the samples of a parameter in one display interval.  Values are nan if no
+        valid samples were read.
+    """
+    min: float
+    mean: float
+    max: float
+    last: float
+
+
+class SampleScheduler:
+    """ Wait for sample deadlines at a fixed interval from the start time.  A sample that ends after
+        the next deadline is an overrun, and the missed deadlines are skipped.
+    """
+    min_interval: float = 0.1
+
+    def __init__(self, interval: float):
+        if interval < self.min_interval:
+            raise ValueError('Sample interval must be at least {} seconds: {}'.format(self.min_interval, interval))
+        self.interval = interval
+        self.start_time: float = monotonic()
+        self.deadline: float = self.start_time
+        self.samples: int = 0
+        self.overruns: int = 0
+        self.missed: int = 0
+        self.max_late: float = 0.0
+
+    def __repr__(self) -> str:
+        return 'SampleScheduler(interval={}, samples={}, overruns={}, missed={}, max_late={:.3f})'.format(
+            self.interval, self.samples, self.overruns, self.missed, self.max_late)
+
+    def wait(self) -> int:
+        """ Sleep until the next sample deadline.
+
+        :return: The number of deadlines missed since the last call.
+        """
+        self.samples += 1
+        self.deadline += self.interval
+        now = monotonic()
+        if now <= self.deadline:
+            sleep(self.deadline - now)
+            return 0
+        late = now - self.deadline
+        missed = floor(late / self.interval) + 1
+        self.overruns += 1
+        self.missed += missed
+        self.max_late = max(self.max_late, late)
+        self.deadline += missed * self.interval
+        LOGGER.debug('Sample overrun by %.3f s, skipped %s deadlines', late, missed)
+        sleep(self.deadline - now)
+        return missed
+
+
+class SensorSchedule:
+    """ Refresh state of a single sensor parameter.  A period of 0 means the value is read once.
+    """
+    __slots__ = ('param', 'min_period', 'max_period', 'period', 'next_tick', 'last_value')
+
+    def __init__(self, param: str, min_period: int, max_period: int):
+        self.param = param
+        self.min_period = min_period
+        self.max_period = max(min_period, max_period)
+        self.period = min_period
+        self.next_tick: Union[int, float] = 0
+        self.last_value: Any = None
+
+    def __repr__(self) -> str:
+        return 'SensorSchedule({}: period={}, next={})'.format(self.param, self.period, self.next_tick)
+
+
+class SensorScheduler:
+    """ Determine which sensor parameters are due to be read on each monitor tick.
+    """
+    def __init__(self, adaptive: bool = False, periods: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.adaptive = adaptive
+        self.periods: Dict[str, Tuple[int, int]] = SENSOR_PERIODS if periods is None else periods
+        self.tick: int = 0
+        self.schedules: Dict[str, SensorSchedule] = {}
+
+    def __repr__(self) -> str:
+        return 'SensorScheduler(tick={}, adaptive={}, {})'.format(self.tick, self.adaptive,
+                                                                 list(self.schedules.values()))
+
+    def get_schedule(self, param: str) -> SensorSchedule:
+        """ Get the schedule for the given parameter, creating it on first use.
+
+        :param param: GpuItem parameter name
+        :return: The schedule of the parameter
+        """
+        schedule = self.schedules.get(param)
+        if schedule is None:
+            schedule = SensorSchedule(param, *self.periods.get(param, (1, 1)))
+            self.schedules[param] = schedule
+        return schedule
+
+    def next_tick(self) -> None:
+        """ Advance to the next monitor tick.  Call once before the reads of each tick.
+        """
+        self.tick += 1
+
+    def is_due(self, param: str) -> bool:
+        """ Check if the given parameter is due to be read on the current tick.
+
+        :param param: GpuItem parameter name
+        :return: True if the parameter should be read.
+        """
+        return self.tick >= self.get_schedule(param).next_tick
+
+    def update(self, param: str, value: Any) -> None:
+        """ Record the value read for the given parameter and set the tick of its next read.  In
+            adaptive mode, the period is doubled if the value is unchanged and reset if it changed.
+
+        :param param: GpuItem parameter name
+        :param value: The value read for the parameter
+        """
+        schedule = self.get_schedule(param)
+        if not schedule.max_period:
+            schedule.next_tick = inf
+            schedule.last_value = value
+            return
+        if self.adaptive:
+            if value == schedule.last_value:
+                schedule.period = min(schedule.period * 2, schedule.max_period)
+            elif schedule.period != schedule.min_period:
+                LOGGER.debug('Sensor [%s] changed, period reset to %s', param, schedule.min_period)
+                schedule.period = schedule.min_period
+        schedule.last_value = value
+        schedule.next_tick = self.tick + schedule.period
+
+    def reset(self) -> None:
+        """ Read all parameters on the next tick and restart adaptive periods.
+        """
+        self.schedules = {}
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+""" Persistent sensor file reader and compiled read plan items used for repetitive polling of
+    sysfs/hwmon driver files.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__credits__ = ['']
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import os
+import logging
+from typing import Dict, List, Tuple, Union, Callable, Any
+from GPUmodules.GPUKeys import SensorType
+
+LOGGER = logging.getLogger('gpu-utils')
+
+
+def read_sensor_file(file_path: str) -> str:
+    """ Read the complete contents of the given sensor file with a single open/read/close.
+
+    :param file_path: Full path of the sensor file.
+    :return: File contents as a string
+    """
+    with open(file_path, 'r', encoding='utf-8') as file_ptr:
+        return file_ptr.read()
+
+
+def read_sensor_bytes(file_path: str) -> bytes:
+    """ Read the complete contents of the given binary sensor file with a single open/read/close.
+
+    :param file_path: Full path of the sensor file.
+    :return: File contents as bytes
+    """
+    with open(file_path, 'rb') as file_ptr:
+        return file_ptr.read()
+
+
+class SensorFileReader:
+    """ Keep sensor files open and re-read them with pread at offset 0.  Sysfs attributes regenerate
+        their contents on each read from the start of the file, so a single open per file is enough
+        for the life of the monitor.
+    """
+    read_size: int = 4096
+
+    def __init__(self):
+        self.fds: Dict[str, int] = {}
+
+    def __del__(self):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.fds)
+
+    def _open(self, file_path: str) -> int:
+        """ Open the given file and save its file descriptor.
+
+        :param file_path: Full path of the sensor file.
+        :return: File descriptor
+        """
+        fd = os.open(file_path, os.O_RDONLY | os.O_CLOEXEC)
+        self.fds[file_path] = fd
+        LOGGER.debug('Opened sensor file [%s] as fd %s', file_path, fd)
+        return fd
+
+    def _close(self, file_path: str) -> None:
+        """ Close the file descriptor for the given path if open.
+
+        :param file_path: Full path of the sensor file.
+        """
+        fd = self.fds.pop(file_path, None)
+        if fd is None: return
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """ Close all open sensor files.
+        """
+        for file_path in list(self.fds):
+            self._close(file_path)
+
+    def read(self, file_path: str) -> str:
+        """ Read the complete contents of the given sensor file.
+
+        :param file_path: Full path of the sensor file.
+        :return: File contents as a string
+        """
+        return self.read_bytes(file_path).decode('utf-8')
+
+    def read_bytes(self, file_path: str) -> bytes:
+        """ Read the complete contents of the given sensor file.  On a failed read the file is reopened
+            once, which covers a device that was removed and added back.  An OSError is raised if the
+            reopened file still can not be read.
+
+        :param file_path: Full path of the sensor file.
+        :return: File contents as bytes
+        """
+        fd = self.fds.get(file_path)
+        if fd is not None:
+            try:
+                return self._pread(fd)
+            except OSError as except_err:
+                LOGGER.debug('Read of open sensor file [%s] failed, reopening: %s', file_path, except_err)
+                self._close(file_path)
+        try:
+            return self._pread(self._open(file_path))
+        except OSError:
+            self._close(file_path)
+            raise
+
+    def _pread(self, fd: int) -> bytes:
+        """ Read from offset 0 of the given file descriptor until the end of data.
+
+        :param fd: File descriptor of an open sensor file.
+        :return: File contents as bytes
+        """
+        data = os.pread(fd, self.read_size, 0)
+        if len(data) == self.read_size:
+            chunks = [data]
+            offset = self.read_size
+            while True:
+                chunk = os.pread(fd, self.read_size, offset)
+                if not chunk: break
+                chunks.append(chunk)
+                offset += len(chunk)
+            data = b''.join(chunks)
+        return data
+
+    def readline(self, file_path: str) -> str:
+        """ Read the first line of the given sensor file.
+
+        :param file_path: Full path of the sensor file.
+        :return: First line of the file
+        """
+        return self.read(file_path).split('\n', 1)[0]
+
+
+class SensorPlanItem:
+    """ Resolved details needed to read a single GpuItem parameter: the absolute sensor file paths,
+        the cached static labels, the conversion factor and the parser used to produce the value.
+    """
+    __slots__ = ('param', 'param_type', 'files', 'labels', 'cf', 'parser')
+
+    def __init__(self, param: str, param_type: SensorType, files: Tuple[str, ...], labels: Tuple[str, ...],
+                 cf: Union[int, float, None], parser: Callable[['SensorPlanItem', List[str]], Any]):
+        self.param = param
+        self.param_type = param_type
+        self.files = files
+        self.labels = labels
+        self.cf = cf
+        self.parser = parser
+
+    def __repr__(self) -> str:
+        return 'SensorPlanItem({}: {}, files={}, labels={})'.format(self.param, self.param_type,
+                                                                     self.files, self.labels)
@@ -35,12 +35,12 @@ from platform import release
 import sys
 import logging
 from pathlib import Path
-import inspect
 from shlex import split as shlex_split
 import shutil
+import json
 from time import mktime as time_mktime
 from datetime import datetime
-from typing import Dict, TextIO, Set, Optional
+from typing import Dict, TextIO, Set, Optional, Tuple, Any
 from GPUmodules import __required_pversion__, __required_kversion__
 from GPUmodules.RegexPatterns import RegexPatterns
 
@@ -55,8 +55,16 @@ class GutConst:
     _dpkg_tool: Dict[str, str] = {'Debian': 'dpkg', 'Ubuntu': 'dpkg', 'Neon': 'dpkg', 'Devuan': 'dpkg',
                                   'Arch': 'pacman',
                                   'Gentoo': 'equery'}
+    # os-release ID to the Distributor ID reported by lsb_release
+    _os_release_ids: Dict[str, str] = {'debian': 'Debian', 'ubuntu': 'Ubuntu', 'neon': 'Neon', 'gentoo': 'Gentoo',
+                                       'arch': 'Arch', 'devuan': 'Devuan'}
+    _os_release_list: Tuple[str, ...] = ('/etc/os-release', '/usr/lib/os-release')
+    # Package database which is modified when packages are installed, by package tool
+    _pkg_db: Dict[str, str] = {'dpkg': '/var/lib/dpkg/status', 'pacman': '/var/lib/pacman/local', 'equery': '/var/db/pkg'}
+    driver_version_cache_file: str = 'driver_version.json'
     _all_args: Set[str] = {'execute_pac', 'debug', 'pdebug', 'sleep', 'no_fan', 'ltz', 'simlog', 'log',
-                           'force_all', 'force_write', 'verbose', 'no_markup'}
+                           'force_all', 'force_write', 'verbose', 'no_markup', 'parallel',
+                           'no_cache', 'adaptive'}
     _sys_pciid_list: Set[str] = {'/usr/share/misc/pci.ids', '/usr/share/hwdata/pci.ids', '/usr/share/doc/pci.ids'}
     _module_path: str = os.path.dirname(str(Path(__file__).resolve()))
     _repository_path: str = os.path.join(_module_path, '..')
@@ -99,17 +107,22 @@ class GutConst:
 
     featuremask: str = '/sys/module/amdgpu/parameters/ppfeaturemask'
     card_root: str = '/sys/class/drm/'
+    pci_root: str = '/sys/bus/pci/devices/'
     hwmon_sub: str = 'hwmon/hwmon'
     gui_window_title: str = 'Ricks-Lab GPU Utilities'
     mon_field_width: int = 20
+    max_read_workers: int = 8
+    # Fraction of the update interval allowed for the read of each GPU in parallel mode.
+    read_budget_fraction: float = 0.5
     TIME_FORMAT: str = '%d-%b-%Y %H:%M:%S'
+    TIME_FORMAT_MS: str = '%d-%b-%Y %H:%M:%S.%f'
 
     def __init__(self):
         self.calling_program: str = ''
         self.args: Optional[argparse.Namespace] = None
         self.repository_path: str = self._repository_path
         self.install_type: Optional[str] = None
-        self.package_path: str = inspect.getfile(inspect.currentframe())
+        self.package_path: str = __file__
 
         if 'dist-packages' in self.package_path: self.install_type = 'debian'
         elif '.local' in self.package_path: self.install_type = 'pypi-linux'
@@ -126,7 +139,13 @@ class GutConst:
             print('Error: Invalid pciid path')
             self.sys_pciid = None
 
+        # User cache directory
+        self.cache_dir: str = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                                           os.path.join(str(Path.home()), '.cache'), 'rickslab-gpu-utils')
+
         self.distro: Dict[str, Optional[str]] = {'Distributor': None, 'Description': None}
+        self.distro_like: Tuple[str, ...] = ()
+        self.amd_driver_version: Optional[Tuple[str, str]] = None
         self.amdfeaturemask: Optional[int] = None
         self.log_file_ptr: Optional[TextIO] = None
 
@@ -142,8 +161,11 @@ class GutConst:
         self.plot: bool = False
         self.show_fans: bool = True
         self.write_delta_only: bool = False
-        self.sleep: int = 2
+        self.sleep: float = 2
         self.useltz: bool = False
+        self.parallel: bool = False
+        self.use_cache: bool = False
+        self.adaptive: bool = False
         # Time
         self.ltz: datetime.tzinfo = datetime.utcnow().astimezone().tzinfo
         # Command access
@@ -171,7 +193,10 @@ class GutConst:
                 if target_arg == 'debug': self.debug = self.args.debug
                 elif target_arg == 'execute_pac': self.execute_pac = self.args.execute_pac
                 elif target_arg == 'pdebug': self.pdebug = self.args.pdebug
-                elif target_arg == 'sleep': self.sleep = self.args.sleep
+                elif target_arg == 'sleep':
+                    self.sleep = self.args.sleep
+                    # Sub-second intervals need sub-second time stamps.
+                    if self.sleep < 1: self.TIME_FORMAT = self.TIME_FORMAT_MS
                 elif target_arg == 'no_fan': self.show_fans = not self.args.no_fan
                 elif target_arg == 'ltz': self.useltz = self.args.ltz
                 elif target_arg == 'simlog': self.simlog = self.args.simlog
@@ -180,6 +205,9 @@ class GutConst:
                 elif target_arg == 'force_all': self.force_all = self.args.force_all
                 elif target_arg == 'verbose': self.verbose = self.args.verbose
                 elif target_arg == 'force_write': self.write_delta_only = not self.args.force_write
+                elif target_arg == 'parallel': self.parallel = self.args.parallel
+                elif target_arg == 'no_cache': self.use_cache = not self.args.no_cache
+                elif target_arg == 'adaptive': self.adaptive = self.args.adaptive
                 else: print('Invalid arg: {}'.format(target_arg))
         LOGGER.propagate = False
         formatter = logging.Formatter("%(levelname)s:%(name)s:%(module)s.%(funcName)s:%(message)s")
@@ -298,34 +326,23 @@ class GutConst:
         self.process_message('System Type: {}'.format(init_type), log_flag=True)
 
         # Check Linux Distro
-        self.cmd_lsb_release = shutil.which('lsb_release')
-        if self.cmd_lsb_release:
-            lsbr_out = subprocess.check_output(shlex_split('{} -a'.format(self.cmd_lsb_release)),
-                                               shell=False, stderr=subprocess.DEVNULL).decode().split('\n')
-            for lsbr_line in lsbr_out:
-                if 'Distributor ID' in lsbr_line:
-                    lsbr_item = re.sub(r'Distributor ID:\s*', '', lsbr_line)
-                    LOGGER.debug('Using Linux Distro: %s', lsbr_item)
-                    self.distro['Distributor'] = lsbr_item.strip()
-                if 'Description' in lsbr_line:
-                    lsbr_item = re.sub(r'Description:\s*', '', lsbr_line)
-                    LOGGER.debug('Linux Distro Description: %s', lsbr_item)
-                    self.distro['Description'] = lsbr_item.strip()
-
-            if self.distro['Distributor'] and self.debug:
-                print('{}: '.format(self.distro['Distributor']), end='')
-                if self.distro['Distributor'] in GutConst._verified_distros: print('Validated')
-                else: print('Unverified')
-        else:
-            print('OS command [lsb_release] executable not found.')
+        if not self.read_os_release():
+            self.read_lsb_release()
+        if self.distro['Distributor'] and self.debug:
+            print('{}: '.format(self.distro['Distributor']), end='')
+            if self.distro['Distributor'] in GutConst._verified_distros: print('Validated')
+            else: print('Unverified')
 
         LOGGER.debug('Distro: %s, %s', self.distro['Distributor'], self.distro['Description'])
         # Check access/paths to system commands
         command_access_fail = False
         self.cmd_lspci = shutil.which('lspci')
         if not self.cmd_lspci:
-            print('Error: OS command [lspci] executable not found.')
-            command_access_fail = True
+            if os.path.isdir(self.pci_root):
+                LOGGER.debug('lspci not found, using sysfs [%s] for pci details', self.pci_root)
+            else:
+                print('Error: OS command [lspci] executable not found.')
+                command_access_fail = True
         LOGGER.debug('lspci path: %s', self.cmd_lspci)
 
         self.cmd_clinfo = shutil.which('clinfo')
@@ -334,45 +351,163 @@ class GutConst:
                 print('Addon Package [clinfo] executable not found.  Use \'sudo apt install clinfo\' to install')
         LOGGER.debug('clinfo path: %s', self.cmd_clinfo)
 
-        # Package Reader
-        if self.distro['Distributor'] in GutConst._dpkg_tool:
-            pkg_tool = GutConst._dpkg_tool[self.distro['Distributor']]
-            self.cmd_dpkg = shutil.which(pkg_tool)
-            if not self.cmd_dpkg:
-                print('OS command [{}] executable not found.'.format(pkg_tool))
+        self.cmd_nvidia_smi = shutil.which('nvidia-smi')
+        LOGGER.debug('nvidia-smi executable full path: [%s]', self.cmd_nvidia_smi)
+        if command_access_fail:
+            return -3
+        return 0
+
+    def read_os_release(self) -> bool:
+        """ Read the Linux distribution from the os-release file.
+
+        :return: True if the distribution was read.
+        """
+        for os_release_path in self._os_release_list:
+            try:
+                with open(os_release_path, 'r', encoding='utf-8') as os_release_ptr:
+                    os_release_lines = os_release_ptr.readlines()
+                break
+            except OSError:
+                continue
+        else:
+            LOGGER.debug('os-release file not found')
+            return False
+        os_release: Dict[str, str] = {}
+        for os_release_line in os_release_lines:
+            os_release_items = os_release_line.strip().split('=', maxsplit=1)
+            if len(os_release_items) != 2 or os_release_items[0].startswith('#'): continue
+            os_release[os_release_items[0]] = os_release_items[1].strip('\'"')
+        LOGGER.debug('os-release [%s]: %s', os_release_path, os_release)
+        distro_id = os_release.get('ID', '').lower()
+        if not distro_id: return False
+        self.distro['Distributor'] = self._os_release_ids.get(distro_id) or \
+            os_release.get('NAME', distro_id).split()[0]
+        self.distro['Description'] = os_release.get('PRETTY_NAME') or os_release.get('NAME')
+        self.distro_like = tuple(os_release.get('ID_LIKE', '').lower().split())
+        LOGGER.debug('Using Linux Distro: %s, like: %s', self.distro['Distributor'], self.distro_like)
+        return True
+
+    def read_lsb_release(self) -> bool:
+        """ Read the Linux distribution with lsb_release.  Used when os-release is not available.
+
+        :return: True if the distribution was read.
+        """
+        self.cmd_lsb_release = shutil.which('lsb_release')
+        if not self.cmd_lsb_release:
+            print('OS command [lsb_release] executable not found.')
+            return False
+        try:
+            lsbr_out = subprocess.check_output(shlex_split('{} -a'.format(self.cmd_lsb_release)),
+                                               shell=False, stderr=subprocess.DEVNULL).decode().split('\n')
+        except (subprocess.CalledProcessError, OSError) as except_err:
+            LOGGER.debug('lsb_release failed: %s', except_err)
+            return False
+        for lsbr_line in lsbr_out:
+            if 'Distributor ID' in lsbr_line:
+                lsbr_item = re.sub(r'Distributor ID:\s*', '', lsbr_line)
+                LOGGER.debug('Using Linux Distro: %s', lsbr_item)
+                self.distro['Distributor'] = lsbr_item.strip()
+            if 'Description' in lsbr_line:
+                lsbr_item = re.sub(r'Description:\s*', '', lsbr_line)
+                LOGGER.debug('Linux Distro Description: %s', lsbr_item)
+                self.distro['Description'] = lsbr_item.strip()
+        return bool(self.distro['Distributor'])
+
+    def get_package_tool(self) -> Optional[str]:
+        """ Get the package query tool for the distribution, looking it up on first use.
+
+        :return: Full path of the package query tool or None if not found.
+        """
+        if self.cmd_dpkg: return self.cmd_dpkg
+        distro_ids = (self.distro['Distributor'],) + tuple(self._os_release_ids.get(like_id) for like_id in self.distro_like)
+        for distro_id in distro_ids:
+            if distro_id in GutConst._dpkg_tool:
+                pkg_tool = GutConst._dpkg_tool[distro_id]
+                self.cmd_dpkg = shutil.which(pkg_tool)
+                if not self.cmd_dpkg:
+                    print('OS command [{}] executable not found.'.format(pkg_tool))
+                break
         else:
             for test_dpkg in GutConst._dpkg_tool.values():
                 self.cmd_dpkg = shutil.which(test_dpkg)
                 if self.cmd_dpkg:
                     break
-            else:
-                self.cmd_dpkg = None
         LOGGER.debug('%s package query tool: %s', self.distro["Distributor"], self.cmd_dpkg)
+        return self.cmd_dpkg
 
-        self.cmd_nvidia_smi = shutil.which('nvidia-smi')
-        LOGGER.debug('nvidia-smi executable full path: [%s]', self.cmd_nvidia_smi)
-        if command_access_fail:
-            return -3
-        return 0
+    def driver_version_cache_key(self) -> Dict[str, Any]:
+        """ Get the key which identifies the package state that the driver version depends on.
+
+        :return: Dictionary of key items.
+        """
+        pkg_db = self._pkg_db.get(os.path.basename(self.cmd_dpkg)) if self.cmd_dpkg else None
+        try:
+            pkg_db_mtime = os.stat(pkg_db).st_mtime_ns if pkg_db else None
+        except OSError:
+            pkg_db_mtime = None
+        return {'distro': self.distro['Distributor'], 'tool': self.cmd_dpkg, 'db': pkg_db, 'mtime_ns': pkg_db_mtime}
+
+    def read_driver_version_cache(self) -> bool:
+        """ Set the AMD driver version from the driver version cache if valid for the package state.
+
+        :return: True if the driver version was read from the cache.
+        """
+        cache_file = os.path.join(self.cache_dir, self.driver_version_cache_file)
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as cache_file_ptr:
+                cache_data = json.load(cache_file_ptr)
+        except (OSError, ValueError) as except_err:
+            LOGGER.debug('Can not read driver version cache [%s]: %s', cache_file, except_err)
+            return False
+        cache_key = self.driver_version_cache_key()
+        if not isinstance(cache_data, dict) or cache_data.get('key') != cache_key or cache_key['mtime_ns'] is None:
+            LOGGER.debug('Driver version cache [%s] is not valid for current package state', cache_file)
+            return False
+        self.amd_driver_version = tuple(cache_data['version']) if cache_data['version'] else None
+        return True
+
+    def write_driver_version_cache(self) -> None:
+        """ Save the AMD driver version to the driver version cache.  Failure to write is not an error.
+        """
+        cache_file = os.path.join(self.cache_dir, self.driver_version_cache_file)
+        tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as cache_file_ptr:
+                json.dump({'key': self.driver_version_cache_key(), 'version': self.amd_driver_version}, cache_file_ptr)
+            os.replace(tmp_file, cache_file)
+        except OSError as except_err:
+            LOGGER.debug('Can not write driver version cache [%s]: %s', cache_file, except_err)
 
     def read_amd_driver_version(self) -> bool:
-        """ Read the AMD driver version and store in GutConst object.
+        """ Read the AMD driver version and store in GutConst object.  The result is cached until the
+            package database is modified.
 
         :return: True on success.
         """
-        if not self.cmd_dpkg:
+        if not self.get_package_tool():
             print('Can not access package read utility to verify AMD driver.')
             return False
-        if re.search(r'([uU]buntu|[dD]ebian)', self.distro['Distributor']):
-            return self.read_amd_driver_version_debian()
-        if re.search(r'([gG]entoo)', self.distro['Distributor']):
-            return self.read_amd_driver_version_gentoo()
-        if re.search(r'([aA]rch)', self.distro['Distributor']):
-            return self.read_amd_driver_version_arch()
+        if not (self.use_cache and self.read_driver_version_cache()):
+            self.amd_driver_version = None
+            distributor = ' '.join((self.distro['Distributor'] or '',) + self.distro_like)
+            if re.search(r'([uU]buntu|[dD]ebian)', distributor):
+                self.read_amd_driver_version_debian()
+            elif re.search(r'([gG]entoo)', distributor):
+                self.read_amd_driver_version_gentoo()
+            elif re.search(r'([aA]rch)', distributor):
+                self.read_amd_driver_version_arch()
+            else:
+                return False
+            if self.use_cache: self.write_driver_version_cache()
+        if self.amd_driver_version:
+            print('AMD: {} version: {}'.format(*self.amd_driver_version))
+            return True
+        print('AMD: amdgpu/rocm version: UNKNOWN')
         return False
 
     def read_amd_driver_version_gentoo(self) -> bool:
-        """ Read the AMD driver version and store in GutConst object.
+        """ Read the AMD driver version with equery and store in GutConst object.
 
         :return: True if successful
         """
@@ -391,13 +526,12 @@ class GutConst:
                     if re.search(driverpkg, dpkg_line):
                         LOGGER.debug(dpkg_line)
                         dpkg_line = re.sub(r'.*]\s*', '', dpkg_line)
-                        print('AMD: {} version: {}'.format(driverpkg, dpkg_line))
+                        self.amd_driver_version = (driverpkg, dpkg_line)
                         return True
-        print('AMD: amdgpu/rocm version: UNKNOWN')
         return False
 
     def read_amd_driver_version_arch(self) -> bool:
-        """ Read the AMD driver version and store in GutConst object.
+        """ Read the AMD driver version with pacman and store in GutConst object.
 
         :return: True if successful
         """
@@ -413,13 +547,12 @@ class GutConst:
                         LOGGER.debug(dpkg_line)
                         dpkg_items = dpkg_line.split()
                         if len(dpkg_items) >= 2:
-                            print('AMD: {} version: {}'.format(driverpkg, dpkg_items[1]))
+                            self.amd_driver_version = (driverpkg, dpkg_items[1])
                             return True
-        print('AMD: amdgpu/rocm version: UNKNOWN')
         return False
 
     def read_amd_driver_version_debian(self) -> bool:
-        """ Read the AMD driver version and store in GutConst object.
+        """ Read the AMD driver version with dpkg and store in GutConst object.
 
         :return: True if successful
         """
@@ -436,9 +569,8 @@ class GutConst:
                         dpkg_items = dpkg_line.split()
                         if len(dpkg_items) > 2:
                             if re.fullmatch(r'.*none.*', dpkg_items[2]): continue
-                            print('AMD: {} version: {}'.format(driverpkg, dpkg_items[2]))
+                            self.amd_driver_version = (driverpkg, dpkg_items[2])
                             return True
-        print('AMD: amdgpu/rocm version: UNKNOWN')
         return False
 
 
@@ -65,8 +65,7 @@ setup(name='rickslab-gpu-utils',
                    'Topic :: System :: Monitoring',
                    'Environment :: GPU',
                    'License :: OSI Approved :: GNU General Public License v3 (GPLv3)'],
-      install_requires=['matplotlib>=3.2.0',
-                        'pandas>=1.1.0'],
+      install_requires=['matplotlib>=3.2.0'],
       data_files=[('share/rickslab-gpu-utils/icons', ['icons/gpu-mon.icon.png',
                                                       'icons/gpu-pac.icon.png',
                                                       'icons/gpu-plot.icon.png']),
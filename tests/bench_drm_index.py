@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+""" Benchmark of the DRM index and GPU discovery on a synthetic sysfs tree of AMD GPUs, as built
+    for test_discovery.py.  Discovery does not use the discovery cache.
+
+    Usage: python3 tests/bench_drm_index.py [gpu_count [repeat]]
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+# pylint: disable=wrong-import-position
+
+import os
+import sys
+import tempfile
+from time import perf_counter
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sysfs_tree
+from GPUmodules.env import GUT_CONST
+from GPUmodules.GPUmodule import GpuList
+
+
+def best_time(function: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """ Run the function repeatedly and get the shortest run time.
+
+    :param function: Function to time
+    :param repeat: Number of runs
+    :return: Shortest run time in seconds and result of the last run
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start_time = perf_counter()
+        result = function()
+        times.append(perf_counter() - start_time)
+    return min(times), result
+
+
+def discover() -> GpuList:
+    """ Discover GPUs of the tree.
+    """
+    gpu_list = GpuList()
+    gpu_list.discover_gpus()
+    return gpu_list
+
+
+def main() -> None:
+    """ Build the tree and time the DRM index and discovery.
+    """
+    gpu_count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sys_root = os.path.join(tmp_dir, 'sys')
+        sysfs_tree.add_amd_gpus(sys_root, gpu_count)
+        GUT_CONST.pci_root = sysfs_tree.pci_root(sys_root)
+        GUT_CONST.card_root = sysfs_tree.card_root(sys_root)
+        GUT_CONST.sys_pciid = None
+        GUT_CONST.use_cache = False
+
+        index_time, drm_index = best_time(GpuList.read_drm_index, repeat)
+        hwmon_count = sum(len(drm_details['hwmon_paths']) for drm_details in drm_index.values())
+        print('DRM index: {} cards, {} hwmon directories in {:.1f} ms'.format(
+            len(drm_index), hwmon_count, index_time * 1000))
+        discovery_time, gpu_list = best_time(discover, repeat)
+        card_count = sum(1 for gpu in gpu_list.gpus() if gpu.prm.card_path)
+        hwmon_count = sum(1 for gpu in gpu_list.gpus() if gpu.prm.hwmon_path)
+        print('Discovery: {} GPUs, {} with card path, {} with hwmon path in {:.1f} ms'.format(
+            gpu_list.num_gpus()['total'], card_count, hwmon_count, discovery_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
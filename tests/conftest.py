@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+""" Common pytest setup for gpu-utils tests.  The tests run from the repository without installing
+    the package and use fixture data in tests/data.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import os
+import sys
+
+TEST_PATH = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(TEST_PATH, 'data')
+sys.path.insert(0, os.path.dirname(TEST_PATH))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+""" Write the gpu_metrics fixture files used by test_gpu_metrics.py.  Each file holds a complete
+    gpu_metrics_vX_Y struct as defined in the amdgpu kgd_pp_interface.h header, including the
+    fields after the common prefix read by GpuMetrics.  The layouts are independent of GpuMetrics,
+    so the tests check its layouts against the driver structs.
+
+    Usage: python3 make_fixtures.py
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import os
+import struct
+from typing import List, Tuple
+
+NA = 0xFFFF
+
+# Struct fields as (struct format, value).  Values not used by GpuMetrics are arbitrary.
+# dGPU values: temperature in C, power in W.  The mem temperature and fan speed are not available.
+DGPU_TEMPS = [('H', 45), ('H', 52), ('H', NA), ('H', 40), ('H', 41), ('H', 42)]
+DGPU_ACTIVITY = [('H', 37), ('H', 12), ('H', 0)]
+DGPU_CLOCKS = [('H', 1800), ('H', 1000), ('H', 870), ('H', 0), ('H', 0), ('H', 0), ('H', 0),
+               ('H', 1850), ('H', 1002), ('H', 875), ('H', 0), ('H', 0), ('H', 0), ('H', 0)]
+DGPU_FAN_LINK = [('I', 0), ('H', NA), ('H', 16), ('H', 160)]
+
+# gpu_metrics_v1_0: 64-bit timestamp first, 32-bit energy accumulator, 8 bit link width/speed.
+GPU_METRICS_V1_0 = ([('Q', 123456789)] + DGPU_TEMPS + DGPU_ACTIVITY + [('H', 123), ('I', 5000)] + DGPU_CLOCKS +
+                    [('I', 0), ('H', NA), ('B', 16), ('B', 4)])
+# gpu_metrics_v1_1: temperatures first, 64-bit energy accumulator, activity accumulators and hbm temperatures.
+GPU_METRICS_V1_1 = (DGPU_TEMPS + DGPU_ACTIVITY + [('H', 123), ('Q', 5000), ('Q', 123456789)] + DGPU_CLOCKS +
+                    DGPU_FAN_LINK + [('H', 0), ('I', 100), ('I', 200), ('4H', (NA, NA, NA, NA))])
+# gpu_metrics_v1_2: adds the firmware timestamp.
+GPU_METRICS_V1_2 = GPU_METRICS_V1_1 + [('Q', 987654321)]
+# gpu_metrics_v1_3: adds voltages and the ASIC independent throttle status.
+GPU_METRICS_V1_3 = GPU_METRICS_V1_2 + [('H', 800), ('H', 900), ('H', 1350), ('H', 0), ('Q', 0)]
+
+# APU values: temperature in centi-C, power in mW.  The uclk is not available.
+GPU_METRICS_V2_0 = ([('Q', 123456789), ('H', 4550), ('H', 4275), ('8H', (5000,) * 8), ('2H', (4800, 4800)),
+                     ('H', 23), ('H', 5),
+                     ('H', 12345), ('H', 4000), ('H', 3000), ('H', 2500), ('8H', (500,) * 8),
+                     ('H', 1100), ('H', 800), ('H', 1000), ('H', 1600), ('H', 0), ('H', 0),
+                     ('H', 1200), ('H', 805), ('H', NA), ('H', 1600), ('H', 0), ('H', 0),
+                     ('8H', (3500,) * 8), ('2H', (3500, 3500)),
+                     ('I', 0), ('H', 0)])
+# gpu_metrics_v2_1: 3 padding words.
+GPU_METRICS_V2_1 = GPU_METRICS_V2_0 + [('3H', (0, 0, 0))]
+# gpu_metrics_v2_2: adds the ASIC independent throttle status.
+GPU_METRICS_V2_2 = GPU_METRICS_V2_1 + [('Q', 0)]
+# gpu_metrics_v2_3: adds average temperatures.
+GPU_METRICS_V2_3 = GPU_METRICS_V2_2 + [('H', 4500), ('H', 4250), ('8H', (4900,) * 8), ('2H', (4700, 4700))]
+# gpu_metrics_v2_4: adds average voltages and currents.
+GPU_METRICS_V2_4 = GPU_METRICS_V2_3 + [('6H', (900, 850, 800, 1000, 2000, 3000))]
+
+FIXTURES: List[Tuple[int, int, list]] = [
+    (1, 0, GPU_METRICS_V1_0), (1, 1, GPU_METRICS_V1_1), (1, 2, GPU_METRICS_V1_2), (1, 3, GPU_METRICS_V1_3),
+    (2, 0, GPU_METRICS_V2_0), (2, 1, GPU_METRICS_V2_1), (2, 2, GPU_METRICS_V2_2), (2, 3, GPU_METRICS_V2_3),
+    (2, 4, GPU_METRICS_V2_4)]
+
+
+def pack_metrics(format_revision: int, content_revision: int, fields: list) -> bytes:
+    """ Pack a gpu_metrics struct with native alignment, as compiled for x86_64.
+
+    :param format_revision: Format revision of the header
+    :param content_revision: Content revision of the header
+    :param fields: List of struct format and value
+    :return: The struct bytes
+    """
+    field_format = '@HBB' + ''.join(item_format for item_format, _ in fields)
+    values: List[int] = []
+    for _, value in fields:
+        values.extend(value if isinstance(value, tuple) else (value, ))
+    # The struct size is padded to the alignment of its largest member.
+    alignment = max(struct.calcsize('@' + item_format[-1]) for item_format, _ in fields)
+    size = struct.calcsize(field_format)
+    size += -size % alignment
+    data = struct.pack(field_format, size, format_revision, content_revision, *values)
+    return data + bytes(size - len(data))
+
+
+def main() -> None:
+    """ Write a fixture file for each gpu_metrics version.
+    """
+    fixture_path = os.path.dirname(os.path.abspath(__file__))
+    for format_revision, content_revision, fields in FIXTURES:
+        file_name = os.path.join(fixture_path, 'gpu_metrics_v{}_{}.bin'.format(format_revision, content_revision))
+        data = pack_metrics(format_revision, content_revision, fields)
+        with open(file_name, 'wb') as file_ptr:
+            file_ptr.write(data)
+        print('{}: {} bytes'.format(file_name, len(data)))
+
+
+if __name__ == '__main__':
+    main()
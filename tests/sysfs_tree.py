@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+""" Build fixture sysfs trees for tests of GPU discovery.  The trees have the layout of the kernel
+    sysfs, with devices under devices/pci0000:00, symlinks to them from bus/pci/devices, and DRM
+    card nodes linked from class/drm.  Set GUT_CONST.pci_root to pci_root() and GUT_CONST.card_root
+    to card_root() of the tree to use it.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=multiple-statements
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import os
+from typing import List, Optional, Sequence
+
+
+def pci_root(sys_root: str) -> str:
+    """ Get the PCI devices directory of the tree, with a trailing separator as in GUT_CONST.
+    """
+    return os.path.join(sys_root, 'bus', 'pci', 'devices', '')
+
+
+def card_root(sys_root: str) -> str:
+    """ Get the DRM class directory of the tree, with a trailing separator as in GUT_CONST.
+    """
+    return os.path.join(sys_root, 'class', 'drm', '')
+
+
+def write_file(file_path: str, contents: str) -> None:
+    """ Write a sysfs attribute file, creating its directory.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as file_ptr:
+        file_ptr.write(contents)
+
+
+def add_pci_device(sys_root: str, pci_address: str, pci_class: Optional[str] = '0x030000',
+                   vendor: str = '0x1002', device: str = '0x73bf', subsystem_vendor: str = '0x1da2',
+                   subsystem_device: str = '0xe438', revision: str = '0xc1',
+                   driver: Optional[str] = 'amdgpu') -> str:
+    """ Add a PCI device to the tree.
+
+    :param sys_root: Root of the tree
+    :param pci_address: Full PCI address such as 0000:01:00.0
+    :param pci_class: Contents of the class file, or None for no class file
+    :param vendor: Contents of the vendor file
+    :param device: Contents of the device file
+    :param subsystem_vendor: Contents of the subsystem_vendor file
+    :param subsystem_device: Contents of the subsystem_device file
+    :param revision: Contents of the revision file
+    :param driver: Name of the bound driver, or None if no driver is bound
+    :return: The device directory
+    """
+    domain = pci_address.split(':')[0]
+    device_path = os.path.join(sys_root, 'devices', 'pci{}:00'.format(domain), pci_address)
+    os.makedirs(device_path)
+    attributes = {'vendor': vendor, 'device': device, 'subsystem_vendor': subsystem_vendor,
+                  'subsystem_device': subsystem_device, 'revision': revision}
+    if pci_class is not None: attributes['class'] = pci_class
+    for name, value in attributes.items():
+        write_file(os.path.join(device_path, name), '{}\n'.format(value))
+    if driver:
+        driver_path = os.path.join(sys_root, 'bus', 'pci', 'drivers', driver)
+        os.makedirs(driver_path, exist_ok=True)
+        os.symlink(os.path.relpath(driver_path, device_path), os.path.join(device_path, 'driver'))
+    os.makedirs(pci_root(sys_root), exist_ok=True)
+    os.symlink(os.path.relpath(device_path, pci_root(sys_root)), os.path.join(pci_root(sys_root), pci_address))
+    return device_path
+
+
+def add_drm_card(sys_root: str, device_path: str, card_num: int, hwmon_nums: Sequence[int] = (),
+                 render_num: Optional[int] = None) -> str:
+    """ Add a DRM card, with its hwmon directories and render node, to a PCI device of the tree.
+
+    :param sys_root: Root of the tree
+    :param device_path: Device directory returned by add_pci_device
+    :param card_num: Card number of the card node
+    :param hwmon_nums: Numbers of the hwmon directories of the device
+    :param render_num: Number of the render node, or None for no render node
+    :return: The card node directory in the DRM class directory
+    """
+    os.makedirs(card_root(sys_root), exist_ok=True)
+    node_names = ['card{}'.format(card_num)]
+    if render_num is not None: node_names.append('renderD{}'.format(render_num))
+    for node_name in node_names:
+        node_path = os.path.join(device_path, 'drm', node_name)
+        os.makedirs(node_path)
+        os.symlink(os.path.relpath(device_path, node_path), os.path.join(node_path, 'device'))
+        os.symlink(os.path.relpath(node_path, card_root(sys_root)), os.path.join(card_root(sys_root), node_name))
+    for hwmon_num in hwmon_nums:
+        write_file(os.path.join(device_path, 'hwmon', 'hwmon{}'.format(hwmon_num), 'name'), 'amdgpu\n')
+    write_file(os.path.join(device_path, 'power', 'runtime_status'), 'active\n')
+    return os.path.join(card_root(sys_root), node_names[0])
+
+
+def add_amd_gpus(sys_root: str, gpu_count: int) -> List[str]:
+    """ Add AMD GPUs on buses 1 to gpu_count, each with a card, render node, and hwmon directory
+        numbered from 0 in bus order.
+
+    :param sys_root: Root of the tree
+    :param gpu_count: Number of GPUs to add
+    :return: PCI addresses of the GPUs
+    """
+    pci_addresses = []
+    for gpu_num in range(gpu_count):
+        pci_address = '0000:{:02x}:00.0'.format(gpu_num + 1)
+        device_path = add_pci_device(sys_root, pci_address)
+        add_drm_card(sys_root, device_path, gpu_num, hwmon_nums=(gpu_num, ), render_num=128 + gpu_num)
+        pci_addresses.append(pci_address)
+    return pci_addresses
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+""" Tests of GPU discovery from a fixture sysfs tree.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import json
+import os
+
+import pytest
+
+import sysfs_tree
+from GPUmodules.env import GUT_CONST
+from GPUmodules.GPUKeys import GpuType, GpuVendor
+from GPUmodules.GPUmodule import GpuList, GpuItem
+
+
+@pytest.fixture
+def sys_root(monkeypatch, tmp_path) -> str:
+    """ Empty fixture sysfs tree used for GPU discovery.
+    """
+    root = str(tmp_path / 'sys')
+    monkeypatch.setattr(GUT_CONST, 'pci_root', sysfs_tree.pci_root(root))
+    monkeypatch.setattr(GUT_CONST, 'card_root', sysfs_tree.card_root(root))
+    monkeypatch.setattr(GUT_CONST, 'sys_pciid', None)
+    monkeypatch.setattr(GUT_CONST, 'cache_dir', str(tmp_path / 'cache'))
+    return root
+
+
+def test_read_pci_sysfs(sys_root):
+    """ Only display controllers are found.  The 0000 domain is removed from the pcie_id and the
+        driver is the name of the driver link.
+    """
+    sysfs_tree.add_pci_device(sys_root, '0000:00:14.0', pci_class='0x0c0330', vendor='0x8086', device='0x7ae0',
+                              driver='xhci_hcd')
+    sysfs_tree.add_pci_device(sys_root, '0000:00:02.0', pci_class='0x038000', vendor='0x8086', device='0x4680',
+                              revision='0x0c', driver='i915')
+    sysfs_tree.add_pci_device(sys_root, '0000:01:00.0')
+    sysfs_tree.add_pci_device(sys_root, '0000:02:00.0', pci_class='0x030200', vendor='0x10de', device='0x2204',
+                              revision='0x00', driver='nvidia')
+    sysfs_tree.add_pci_device(sys_root, '0001:03:00.0', driver=None)
+    sysfs_tree.add_pci_device(sys_root, '0000:04:00.0', pci_class=None)
+    sysfs_tree.add_pci_device(sys_root, '0000:05:00.0', pci_class='invalid')
+
+    pci_details = GpuList.read_pci_sysfs()
+    assert list(pci_details) == ['00:02.0', '01:00.0', '02:00.0', '0001:03:00.0']
+    assert pci_details['01:00.0'] == {'class': '0x030000', 'vendor': '1002', 'device': '73bf',
+                                      'subsystem_vendor': '1da2', 'subsystem_device': 'e438', 'revision': 'c1',
+                                      'driver': 'amdgpu',
+                                      'name': 'Advanced Micro Devices, Inc. [AMD/ATI] Device 73bf (rev c1)',
+                                      'subsystem_name': ''}
+    assert pci_details['02:00.0']['driver'] == 'nvidia'
+    assert pci_details['02:00.0']['name'] == 'NVIDIA Corporation Device 2204'
+    assert pci_details['00:02.0']['driver'] == 'i915'
+    assert pci_details['0001:03:00.0']['driver'] == 'UNKNOWN'
+
+
+def test_read_pci_sysfs_missing(sys_root):
+    assert GpuList.read_pci_sysfs() is None
+
+
+def test_read_drm_index(sys_root):
+    """ All cards, hwmon directories, and render nodes of a 64 GPU node are indexed, including card
+        and hwmon numbers of 10 and above.
+    """
+    pci_addresses = sysfs_tree.add_amd_gpus(sys_root, 64)
+    drm_index = GpuList.read_drm_index()
+    assert sorted(drm_index) == pci_addresses
+    for gpu_num, pci_address in enumerate(pci_addresses):
+        device_path = os.path.join(sys_root, 'devices', 'pci0000:00', pci_address)
+        drm_details = drm_index[pci_address]
+        assert drm_details['card_path'] == os.path.join(sysfs_tree.card_root(sys_root), 'card{}'.format(gpu_num), 'device')
+        assert drm_details['sys_card_path'] == os.path.realpath(device_path)
+        assert drm_details['hwmon_paths'] == [os.path.join(drm_details['card_path'], 'hwmon', 'hwmon{}'.format(gpu_num))]
+        assert drm_details['render_node'] == '/dev/dri/renderD{}'.format(128 + gpu_num)
+
+
+def test_discover_gpus_drm_paths(sys_root, monkeypatch):
+    """ Discovery sets the card and hwmon paths of every GPU of a 64 GPU node.
+    """
+    monkeypatch.setattr(GUT_CONST, 'use_cache', False)
+    pci_addresses = sysfs_tree.add_amd_gpus(sys_root, 64)
+    gpu_list = GpuList()
+    assert gpu_list.discover_gpus()
+    gpus = sorted(gpu_list.gpus(), key=lambda gpu: gpu.prm.pcie_id)
+    assert ['0000:{}'.format(gpu.prm.pcie_id) for gpu in gpus] == pci_addresses
+    for gpu_num, gpu in enumerate(gpus):
+        assert gpu.prm.card_path == os.path.join(sysfs_tree.card_root(sys_root), 'card{}'.format(gpu_num), 'device')
+        assert gpu.prm.hwmon_path == os.path.join(gpu.prm.card_path, 'hwmon', 'hwmon{}'.format(gpu_num))
+
+
+def test_read_drm_index_missing(sys_root):
+    assert GpuList.read_drm_index() == {}
+
+
+def make_cached_gpu_list(device_path: str) -> GpuList:
+    """ Make a GpuList with one AMD GPU of the given device, as set by discovery.
+    """
+    gpu_list = GpuList()
+    gpu = GpuItem('amd0')
+    gpu.prm.vendor = GpuVendor.AMD
+    gpu.prm.gpu_type = GpuType.Supported
+    gpu.prm.card_path = '{}/'.format(device_path)
+    gpu.prm.pcie_id = '01:00.0'
+    gpu.prm.id = {'vendor': '0x1002', 'device': '0x73bf', 'subsystem_vendor': '0x1da2', 'subsystem_device': '0xe438'}
+    gpu.read_skip = {'vbios', 'fan_pwm'}
+    gpu.read_disabled = ['pp_features']
+    gpu_list.add(gpu)
+    return gpu_list
+
+
+def test_discovery_cache(sys_root):
+    """ The discovery cache is JSON, and enum parameters and skip lists are restored on read.
+    """
+    device_path = sysfs_tree.add_pci_device(sys_root, '0000:01:00.0')
+    make_cached_gpu_list(device_path).write_discovery_cache()
+    cache_file = os.path.join(GUT_CONST.cache_dir, GpuList.discovery_cache_file)
+    with open(cache_file, 'r', encoding='utf-8') as cache_file_ptr:
+        cache_data = json.load(cache_file_ptr)
+    assert cache_data['gpus'][0]['prm']['vendor'] == 'AMD'
+    assert cache_data['gpus'][0]['read_skip'] == ['fan_pwm', 'vbios']
+
+    gpu_list = GpuList()
+    assert gpu_list.read_discovery_cache()
+    gpu = gpu_list['amd0']
+    assert gpu.prm.vendor is GpuVendor.AMD
+    assert gpu.prm.gpu_type is GpuType.Supported
+    assert gpu.prm.card_path == '{}/'.format(device_path)
+    assert gpu.prm.id['device'] == '0x73bf'
+    assert gpu.read_skip == {'vbios', 'fan_pwm'}
+    assert gpu.read_disabled == ['pp_features']
+
+    # The cache is not used after a change of PCI topology.
+    sysfs_tree.add_pci_device(sys_root, '0000:02:00.0')
+    assert not GpuList().read_discovery_cache()
+
+
+@pytest.mark.parametrize('cache_text', ['', 'not json', '[]', '{"key": null}'])
+def test_discovery_cache_invalid(sys_root, cache_text):
+    os.makedirs(GUT_CONST.cache_dir)
+    with open(os.path.join(GUT_CONST.cache_dir, GpuList.discovery_cache_file), 'w', encoding='utf-8') as cache_file_ptr:
+        cache_file_ptr.write(cache_text)
+    assert not GpuList().read_discovery_cache()
+
+
+def test_discovery_cache_unknown_enum(sys_root):
+    """ A cache with an enum name which is not defined is not used.
+    """
+    device_path = sysfs_tree.add_pci_device(sys_root, '0000:01:00.0')
+    make_cached_gpu_list(device_path).write_discovery_cache()
+    cache_file = os.path.join(GUT_CONST.cache_dir, GpuList.discovery_cache_file)
+    with open(cache_file, 'r', encoding='utf-8') as cache_file_ptr:
+        cache_data = json.load(cache_file_ptr)
+    cache_data['gpus'][0]['prm']['gpu_type'] = 'Removed'
+    with open(cache_file, 'w', encoding='utf-8') as cache_file_ptr:
+        json.dump(cache_data, cache_file_ptr)
+    gpu_list = GpuList()
+    assert not gpu_list.read_discovery_cache()
+    assert not gpu_list.list
+
+
+def test_opencl_cache(sys_root):
+    """ The OpenCL map is saved as JSON and only read for the same GPUs.
+    """
+    device_path = sysfs_tree.add_pci_device(sys_root, '0000:01:00.0')
+    gpu_list = make_cached_gpu_list(device_path)
+    gpu_list.opencl_map = {'01:00.0': {'device_name': 'gfx1030', 'device_version': 'OpenCL 2.0', 'prf_wg_size': None}}
+    gpu_list.write_opencl_cache()
+    with open(os.path.join(GUT_CONST.cache_dir, GpuList.opencl_cache_file), 'r', encoding='utf-8') as cache_file_ptr:
+        assert json.load(cache_file_ptr)['opencl_map'] == gpu_list.opencl_map
+
+    cached_list = make_cached_gpu_list(device_path)
+    assert cached_list.read_opencl_cache()
+    assert cached_list.opencl_map == gpu_list.opencl_map
+    cached_list['amd0'].prm.pcie_id = '02:00.0'
+    assert not cached_list.read_opencl_cache()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+""" Tests of the gpu_metrics parser, using fixture files of each supported gpu_metrics version
+    written by tests/data/gpu_metrics/make_fixtures.py.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import os
+import shutil
+import struct
+
+import pytest
+
+from conftest import DATA_PATH
+from GPUmodules import GPUmodule
+from GPUmodules.GPUKeys import GpuVendor, GpuType, SensorSet
+from GPUmodules.GpuMetrics import parse_gpu_metrics, get_format, METRICS_FORMATS, HEADER
+
+V1_REVISIONS = [(1, 0), (1, 1), (1, 2), (1, 3)]
+V2_REVISIONS = [(2, 0), (2, 1), (2, 2), (2, 3), (2, 4)]
+
+# Values of the fixtures in the units of the hwmon sensors.  Not available values are omitted or None.
+V1_VALUES = {'temperatures': {'edge': 45.0, 'junction': 52.0},
+             'frequencies':  {'sclk': 1850.0, 'mclk': 875.0},
+             'loading':      37.0,
+             'mem_loading':  12.0,
+             'power':        123.0,
+             'fan_speed':    None}
+V2_VALUES = {'temperatures': {'edge': 45.5},
+             'frequencies':  {'sclk': 1200.0},
+             'loading':      23.0,
+             'power':        12.345}
+
+
+def read_fixture(revision) -> bytes:
+    """ Read the gpu_metrics fixture of the given format and content revision.
+    """
+    with open(os.path.join(DATA_PATH, 'gpu_metrics', 'gpu_metrics_v{}_{}.bin'.format(*revision)), 'rb') as file_ptr:
+        return file_ptr.read()
+
+
+def set_header(data: bytes, structure_size: int, format_revision: int, content_revision: int) -> bytes:
+    """ Replace the header of gpu_metrics data.
+    """
+    return HEADER.pack(structure_size, format_revision, content_revision) + data[HEADER.size:]
+
+
+def test_fixtures_cover_formats():
+    assert sorted(METRICS_FORMATS) == V1_REVISIONS + V2_REVISIONS
+
+
+@pytest.mark.parametrize('revision', V1_REVISIONS)
+def test_parse_v1(revision):
+    data = read_fixture(revision)
+    assert get_format(data) == revision
+    assert parse_gpu_metrics(data) == V1_VALUES
+    assert parse_gpu_metrics(memoryview(data)) == V1_VALUES
+
+
+@pytest.mark.parametrize('revision', V2_REVISIONS)
+def test_parse_v2(revision):
+    """ v2 temperatures are scaled from centi-C and power from mW.
+    """
+    data = read_fixture(revision)
+    assert get_format(data) == revision
+    values = parse_gpu_metrics(data)
+    assert values == V2_VALUES
+    assert values['temperatures']['edge'] == 4550 / 100
+    assert values['power'] == 12345 / 1000
+
+
+def test_not_available():
+    """ 0xFFFF values are None, and a dict value with no available items is None.
+    """
+    data = bytearray(read_fixture((1, 1)))
+    # temperature_edge, temperature_hotspot and average_gfx_activity of gpu_metrics_v1_1.
+    for offset in (4, 6, 16):
+        struct.pack_into('<H', data, offset, 0xFFFF)
+    values = parse_gpu_metrics(bytes(data))
+    assert values['temperatures'] is None
+    assert values['loading'] is None
+    assert values['fan_speed'] is None
+    assert values['power'] == 123.0
+
+
+@pytest.mark.parametrize('header', [(1, 4), (1, 255), (2, 5), (3, 0), (0, 0)])
+def test_unknown_header(header):
+    data = set_header(read_fixture((1, 3)), 120, *header)
+    assert get_format(data) is None
+    assert parse_gpu_metrics(data) is None
+
+
+@pytest.mark.parametrize('revision', V1_REVISIONS + V2_REVISIONS)
+def test_short_data(revision):
+    """ Data or structure size shorter than the fields read are rejected.
+    """
+    data = read_fixture(revision)
+    layout_size = METRICS_FORMATS[revision].layout.size
+    assert parse_gpu_metrics(data[:layout_size - 1]) is None
+    assert parse_gpu_metrics(set_header(data, layout_size - 1, *revision)) is None
+    assert parse_gpu_metrics(data[:layout_size]) is not None
+    assert parse_gpu_metrics(data[:HEADER.size - 1]) is None
+    assert parse_gpu_metrics(b'') is None
+
+
+def test_suspended_gpu_not_probed(monkeypatch, tmp_path):
+    """ gpu_metrics is not read while the device is runtime suspended, since the read would resume it.
+        It is used from the first read with the device active.
+    """
+    (tmp_path / 'power').mkdir()
+    (tmp_path / 'power' / 'runtime_status').write_text('suspended\n')
+    shutil.copy(os.path.join(DATA_PATH, 'gpu_metrics', 'gpu_metrics_v1_1.bin'), str(tmp_path / 'gpu_metrics'))
+    metrics_reads = []
+    read_sensor_bytes = GPUmodule.read_sensor_bytes
+    monkeypatch.setattr(GPUmodule, 'read_sensor_bytes', lambda path: metrics_reads.append(path) or read_sensor_bytes(path))
+
+    gpu = GPUmodule.GpuItem('amd0')
+    gpu.prm.vendor = GpuVendor.AMD
+    gpu.prm.gpu_type = GpuType.Modern
+    gpu.prm.readable = True
+    gpu.prm.card_path = '{}/'.format(tmp_path)
+    gpu.compile_read_plan()
+    assert gpu.gpu_metrics_pending
+    assert gpu.read_gpu_sensor_set(SensorSet.Monitor)
+    assert gpu.is_suspended()
+    assert gpu.gpu_metrics_path is None
+    assert not metrics_reads
+
+    (tmp_path / 'power' / 'runtime_status').write_text('active\n')
+    assert gpu.read_gpu_sensor_set(SensorSet.Monitor)
+    assert not gpu.gpu_metrics_pending
+    assert gpu.gpu_metrics_path == str(tmp_path / 'gpu_metrics')
+    assert len(metrics_reads) == 1
+    assert gpu.prm.temperatures == {'edge': 45.0, 'junction': 52.0}
+
+    # The probe is deferred again when the plan is recompiled while suspended.
+    (tmp_path / 'power' / 'runtime_status').write_text('suspended\n')
+    gpu.set_field_params(None)
+    assert gpu.read_gpu_sensor_set(SensorSet.Monitor)
+    assert gpu.gpu_metrics_pending
+    assert len(metrics_reads) == 1
+
+
+def test_failed_gpu_metrics_disabled(monkeypatch, tmp_path):
+    """ After a failed gpu_metrics read, the Monitor parameters are read from their sensor files
+        without recompiling the read plan, and gpu_metrics is not probed again.
+    """
+    (tmp_path / 'hwmon').mkdir()
+    (tmp_path / 'hwmon' / 'temp1_input').write_text('30000\n')
+    (tmp_path / 'hwmon' / 'temp1_label').write_text('edge\n')
+    shutil.copy(os.path.join(DATA_PATH, 'gpu_metrics', 'gpu_metrics_v1_1.bin'), str(tmp_path / 'gpu_metrics'))
+    metrics_reads = []
+    read_sensor_bytes = GPUmodule.read_sensor_bytes
+    monkeypatch.setattr(GPUmodule, 'read_sensor_bytes', lambda path: metrics_reads.append(path) or read_sensor_bytes(path))
+
+    gpu = GPUmodule.GpuItem('amd0')
+    gpu.prm.vendor = GpuVendor.AMD
+    gpu.prm.gpu_type = GpuType.Modern
+    gpu.prm.readable = True
+    gpu.prm.card_path = '{}/'.format(tmp_path)
+    gpu.prm.hwmon_path = '{}/'.format(tmp_path / 'hwmon')
+    gpu.compile_read_plan()
+    full_plan = [plan_item.param for plan_item in gpu.gpu_metrics_fallback_plan]
+    assert 'temperatures' in full_plan
+    assert 'temperatures' in gpu.gpu_metrics_params
+    assert 'temperatures' not in [plan_item.param for plan_item in gpu.read_plan[SensorSet.Monitor]]
+    assert gpu.read_gpu_sensor_set(SensorSet.Monitor)
+    assert gpu.prm.temperatures == {'edge': 45.0, 'junction': 52.0}
+
+    (tmp_path / 'gpu_metrics').write_bytes(b'')
+    with monkeypatch.context() as patch:
+        patch.setattr(gpu, 'compile_read_plan', lambda: pytest.fail('read plan recompiled'))
+        assert gpu.read_gpu_sensor_set(SensorSet.Monitor)
+    assert gpu.gpu_metrics_disabled
+    assert gpu.gpu_metrics_path is None
+    assert [plan_item.param for plan_item in gpu.read_plan[SensorSet.Monitor]] == full_plan
+    assert gpu.prm.temperatures == {'edge': 30.0}
+
+    # gpu_metrics stays disabled when the read plan is recompiled.
+    gpu.set_field_params(None)
+    assert gpu.read_gpu_sensor_set(SensorSet.Monitor)
+    assert gpu.gpu_metrics_disabled
+    assert gpu.gpu_metrics_path is None
+    assert len(metrics_reads) == 1
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+""" Tests of the NVIDIA sensor backends, using a fake nvidia-smi script and NvmlShim in place of
+    the driver tool and library.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import atexit
+import os
+import sys
+from time import monotonic, sleep
+from typing import Callable
+
+import pytest
+
+from conftest import DATA_PATH
+from GPUmodules.env import GUT_CONST
+from GPUmodules.GPUKeys import GpuVendor, SensorSet
+from GPUmodules.GPUmodule import GpuList, GpuItem
+from GPUmodules.NvBackend import NvSmiStream, NvmlShim, NvmlBackend, NvmlError, bus_id_key
+
+FAKE_NVIDIA_SMI = '{} {}'.format(sys.executable, os.path.join(DATA_PATH, 'fake-nvidia-smi'))
+QUERY_LIST = ['power.draw', 'temperature.gpu', 'pstate']
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 10.0) -> bool:
+    """ Poll the given condition until it is True or the timeout expires.
+    """
+    end_time = monotonic() + timeout
+    while monotonic() < end_time:
+        if condition(): return True
+        sleep(0.02)
+    return condition()
+
+
+@pytest.fixture
+def nv_stream():
+    """ NvSmiStream using the fake nvidia-smi, stopped at the end of the test.
+    """
+    stream = NvSmiStream(FAKE_NVIDIA_SMI, QUERY_LIST, loop_ms=100)
+    stream.restart_delay = 0.05
+    yield stream
+    stream.stop()
+
+
+def test_bus_id_key():
+    assert bus_id_key('01:00.0') == '0000:01:00.0'
+    assert bus_id_key('0000:01:00.0') == '0000:01:00.0'
+    assert bus_id_key('00000000:0A:00.0') == '0000:0a:00.0'
+
+
+def test_parse_line(nv_stream):
+    assert nv_stream.parse_line('00000000:01:00.0, 85.12, 61, P2\n')
+    assert nv_stream.get_sample('01:00.0') == {'power.draw': '85.12', 'temperature.gpu': '61', 'pstate': 'P2'}
+    # Partial and extra field lines are not samples.
+    assert not nv_stream.parse_line('00000000:02:00.0, 85.12, 61')
+    assert not nv_stream.parse_line('00000000:02:00.0, 85.12, 61, P2, 1')
+    assert nv_stream.get_sample('02:00.0') is None
+
+
+def test_incremental_parse(nv_stream, monkeypatch):
+    """ Samples are available while nvidia-smi is still running.
+    """
+    monkeypatch.setenv('FAKE_NVSMI_SAMPLES', '1')
+    monkeypatch.setenv('FAKE_NVSMI_HOLD', '1')
+    nv_stream.start()
+    assert wait_for(lambda: nv_stream.get_sample('01:00.0') is not None)
+    assert nv_stream.process.poll() is None
+    assert nv_stream.get_sample('01:00.0')['power.draw'] == '101.00'
+    assert nv_stream.restarts == 0
+
+
+def test_latest_sample_per_bus_id(nv_stream, monkeypatch):
+    monkeypatch.setenv('FAKE_NVSMI_BUS_IDS', '00000000:01:00.0,00000000:0A:00.0')
+    monkeypatch.setenv('FAKE_NVSMI_SAMPLES', '3')
+    monkeypatch.setenv('FAKE_NVSMI_HOLD', '1')
+    nv_stream.start()
+    assert wait_for(lambda: (nv_stream.get_sample('0a:00.0') or {}).get('power.draw') == '103.00')
+    assert nv_stream.get_sample('0000:01:00.0')['power.draw'] == '103.00'
+    assert set(nv_stream.samples) == {'0000:01:00.0', '0000:0a:00.0'}
+    assert nv_stream.get_sample('02:00.0') is None
+    # Old samples are rejected when a max age is given.
+    sleep(0.2)
+    assert nv_stream.get_sample('01:00.0', max_age=0.1) is None
+
+
+def test_restart_after_exit(nv_stream, monkeypatch, tmp_path):
+    """ nvidia-smi is restarted when it exits and samples of the new run replace the old.
+    """
+    monkeypatch.setenv('FAKE_NVSMI_SAMPLES', '2')
+    monkeypatch.setenv('FAKE_NVSMI_RUNS', str(tmp_path / 'runs'))
+    nv_stream.start()
+    assert wait_for(lambda: (nv_stream.get_sample('01:00.0') or {}).get('power.draw', '').startswith('2'))
+    assert nv_stream.restarts >= 1
+    assert nv_stream.is_running()
+    nv_stream.stop()
+    assert not nv_stream.is_running()
+
+
+def test_exit_handler(nv_stream, monkeypatch):
+    """ The exit handler is set while the stream runs and removed when it is stopped.
+    """
+    exit_handlers = []
+
+    def unregister(handler: Callable) -> None:
+        exit_handlers[:] = [item for item in exit_handlers if item != handler]
+
+    monkeypatch.setattr(atexit, 'register', exit_handlers.append)
+    monkeypatch.setattr(atexit, 'unregister', unregister)
+    monkeypatch.setenv('FAKE_NVSMI_HOLD', '1')
+    for _ in range(3):
+        nv_stream.start()
+        assert exit_handlers == [nv_stream.stop]
+        nv_stream.stop()
+        assert not exit_handlers
+
+
+def test_restart_missing_command(monkeypatch):
+    """ A command which can not be run is retried without stopping the reader thread.
+    """
+    stream = NvSmiStream(os.path.join(DATA_PATH, 'missing-nvidia-smi'), QUERY_LIST, loop_ms=100)
+    stream.restart_delay = 0.01
+    stream.max_restart_delay = 0.01
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.restarts >= 2)
+        assert stream.is_running()
+        assert stream.get_sample('01:00.0') is None
+    finally:
+        stream.stop()
+
+
+@pytest.fixture
+def nvml_shim():
+    """ NvmlShim with two GPUs.
+    """
+    return NvmlShim(['01:00.0', '0000:02:00.0'])
+
+
+def test_nvml_units(nvml_shim):
+    """ Values are converted from NVML units to nvidia-smi units.
+    """
+    backend = NvmlBackend(nvml_shim)
+    values = backend.read('00000000:01:00.0', ['power.draw', 'power.limit', 'temperature.gpu', 'clocks.gr',
+                                               'clocks.mem', 'utilization.gpu', 'utilization.memory',
+                                               'memory.used', 'fan.speed', 'pstate', 'gom.current'])
+    assert values == {'power.draw': 85.0, 'power.limit': 250.0, 'temperature.gpu': 61.0, 'clocks.gr': 1800.0,
+                      'clocks.mem': 7000.0, 'utilization.gpu': 44.0, 'utilization.memory': 12.0,
+                      'memory.used': 2048.0, 'fan.speed': 35.0, 'pstate': 2, 'gom.current': 'All On'}
+
+
+def test_nvml_unknown_gpu(nvml_shim):
+    assert NvmlBackend(nvml_shim).read('03:00.0', ['power.draw']) is None
+
+
+def test_nvml_values_per_gpu(nvml_shim):
+    """ Each GPU of the shim has its own values.
+    """
+    nvml_shim.values['0000:01:00.0']['clock'][0] = 900
+    backend = NvmlBackend(nvml_shim)
+    assert backend.read('01:00.0', ['clocks.gr']) == {'clocks.gr': 900.0}
+    assert backend.read('02:00.0', ['clocks.gr']) == {'clocks.gr': 1800.0}
+
+
+def test_nvml_error_unsupported(nvml_shim):
+    """ A sensor which returns an NvmlError is marked unsupported and not read again.
+    """
+    nvml_shim.values['0000:01:00.0']['fan_speed'] = NvmlError('nvmlDeviceGetFanSpeed', 3)
+    backend = NvmlBackend(nvml_shim)
+    assert backend.read('01:00.0', ['fan.speed', 'power.draw']) == {'fan.speed': None, 'power.draw': 85.0}
+    assert backend.unsupported['0000:01:00.0'] == {'fan.speed'}
+    nvml_shim.values['0000:01:00.0']['fan_speed'] = 50
+    call_count = nvml_shim.call_count
+    assert backend.read('01:00.0', ['fan.speed']) == {'fan.speed': None}
+    assert nvml_shim.call_count == call_count
+    assert backend.read('02:00.0', ['fan.speed']) == {'fan.speed': 35.0}
+
+
+def make_nv_gpu_list(monkeypatch, nvml_shim: NvmlShim) -> GpuList:
+    """ Make a GpuList of validated NVIDIA GPUs for the bus ids of the shim, read with NVML.
+    """
+    monkeypatch.setattr(GUT_CONST, 'cmd_nvidia_smi', os.path.join(DATA_PATH, 'missing-nvidia-smi'))
+    gpu_list = GpuList()
+    for card_num, bus_id in enumerate(nvml_shim.values):
+        gpu = GpuItem('nv{}'.format(card_num))
+        gpu.prm.vendor = GpuVendor.NVIDIA
+        gpu.prm.card_num = card_num
+        gpu.prm.pcie_id = bus_id
+        gpu.prm.readable = True
+        gpu.validated_sensors = True
+        gpu_list.list[gpu.prm.uuid] = gpu
+    assert gpu_list.start_nvml(NvmlBackend(nvml_shim))
+    return gpu_list
+
+
+def test_nvml_gpu_list_read(monkeypatch, nvml_shim):
+    """ Monitor reads of NVIDIA GPUs use NVML values in GpuItem units.
+    """
+    nvml_shim.values['0000:02:00.0']['performance_state'] = 32
+    nvml_shim.values['0000:02:00.0']['power_usage'] = NvmlError('nvmlDeviceGetPowerUsage', 3)
+    gpu_list = make_nv_gpu_list(monkeypatch, nvml_shim)
+    assert gpu_list.read_gpu_sensor_set_nv(SensorSet.Monitor) == {'nv0', 'nv1'}
+    gpu0, gpu1 = gpu_list['nv0'], gpu_list['nv1']
+    assert gpu0.get_snapshot_value('power') == 85.0
+    assert gpu0.prm.power_cap == 250.0
+    assert gpu0.prm.temperatures == {'temperature.gpu': 61.0}
+    assert gpu0.prm.mem_vram_used == 2.0
+    assert gpu0.prm.sclk_ps[0] == 2
+    # An unknown p-state of 16 or more is not displayed.
+    assert gpu1.prm.sclk_ps[0] is None
+    assert gpu1.prm.mclk_ps[0] is None
+    # An unsupported power sensor disables power and energy reads.
+    assert 'power' in gpu1.read_disabled
+    assert gpu1.get_snapshot_value('power') is None
+
+    # The operation mode is read on each Monitor read.
+    assert gpu0.get_snapshot_value('ppm') == 'All On'
+    nvml_shim.values['0000:01:00.0']['gpu_operation_mode'] = 1
+    nvml_shim.values['0000:02:00.0']['gpu_operation_mode'] = NvmlError('nvmlDeviceGetGpuOperationMode', 3)
+    gpu_list.read_gpu_sensor_set_nv(SensorSet.Monitor)
+    assert gpu0.get_snapshot_value('ppm') == 'Compute'
+    assert gpu1.get_snapshot_value('ppm') is None
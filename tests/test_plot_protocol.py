@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+""" Round trip tests of the binary plot stream, written by PlotStreamWriter and read by
+    PlotStreamReader.
+
+    Copyright (C) 2024  RicksLab
+
+    This program is free software: you can redistribute it and/or modify it
+    under the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along with
+    this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+__author__ = 'RicksLab'
+__copyright__ = 'Copyright (C) 2024 RicksLab'
+__license__ = 'GNU General Public License'
+__program_name__ = 'gpu-utils'
+__maintainer__ = 'RicksLab'
+__docformat__ = 'reStructuredText'
+
+# pylint: disable=line-too-long
+# pylint: disable=consider-using-f-string
+
+import io
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from GPUmodules.PlotProtocol import PlotStreamWriter, PlotStreamReader, is_plot_stream, NUMERIC_TYPE, TEXT_TYPE
+
+FIELDS = ['model_display', 'power', 'temp_val', 'sclk_f_val', 'ppm']
+START_TIME = datetime(2024, 3, 1, 12, 30, 15, 250000)
+GPU_VALUES = [(0, {'model_display': 'Radeon RX 6900 XT', 'power': 250.5, 'temp_val': 65, 'sclk_f_val': '2100 MHz',
+                   'ppm': '1-3D_FULL_SCREEN'}),
+              (11, {'model_display': 'GeForce RTX 3090 µ', 'power': None, 'temp_val': 'NA', 'sclk_f_val': 1800,
+                    'ppm': None})]
+
+
+def write_stream(frames: int = 3, skip: tuple = ()) -> bytes:
+    """ Write a plot stream of frames one second apart, leaving out the frames in skip.
+    """
+    writer = PlotStreamWriter(FIELDS)
+    stream = [writer.header_bytes()]
+    for frame_num in range(frames):
+        frame = writer.frame_bytes(START_TIME + timedelta(seconds=frame_num), GPU_VALUES)
+        if frame_num not in skip: stream.append(frame)
+    return b''.join(stream)
+
+
+def test_header():
+    reader = PlotStreamReader(io.BytesIO(write_stream(0)))
+    assert reader.text_fields == ('model_display', 'ppm')
+    assert reader.numeric_fields == ('power', 'temp_val', 'sclk_f_val')
+    assert reader.field_types[0] == ('model_display', TEXT_TYPE)
+    assert reader.field_types[1] == ('power', NUMERIC_TYPE)
+    assert reader.read_frame() is None
+
+
+def test_round_trip():
+    """ Text fields are kept as text, numeric values are floats, and values which are not numeric
+        are nan.
+    """
+    reader = PlotStreamReader(io.BytesIO(write_stream()))
+    for frame_num in range(3):
+        frame = reader.read_frame()
+        assert frame.sequence == frame_num + 1
+        assert frame.time == START_TIME + timedelta(seconds=frame_num)
+        assert [card_num for card_num, _ in frame.gpus] == [0, 11]
+    (_, values0), (_, values1) = frame.gpus
+    assert values0 == {'model_display': 'Radeon RX 6900 XT', 'power': 250.5, 'temp_val': 65.0, 'sclk_f_val': 2100.0, 'ppm': '1-3D_FULL_SCREEN'}
+    assert values1['model_display'] == 'GeForce RTX 3090 µ'
+    assert values1['ppm'] == ''
+    assert math.isnan(values1['power'])
+    assert math.isnan(values1['temp_val'])
+    assert values1['sclk_f_val'] == 1800.0
+    assert reader.read_frame() is None
+    assert reader.dropped == 0
+
+
+def test_truncated_frame():
+    """ A frame cut off in its header or records ends the stream.
+    """
+    stream = write_stream(2)
+    frame_size = (len(stream) - len(write_stream(0))) // 2
+    for cut in (1, frame_size // 2, frame_size - 1):
+        reader = PlotStreamReader(io.BytesIO(stream[:-cut]))
+        assert reader.read_frame().sequence == 1
+        assert reader.read_frame() is None
+
+
+def test_truncated_header():
+    with pytest.raises(EOFError):
+        PlotStreamReader(io.BytesIO(write_stream(0)[:-1]))
+    with pytest.raises(ValueError):
+        PlotStreamReader(io.BytesIO(b'XXXX' + write_stream(0)[4:]))
+
+
+def test_sequence_gap():
+    """ Frames missing from the stream are counted from the sequence numbers.
+    """
+    reader = PlotStreamReader(io.BytesIO(write_stream(7, skip=(1, 2, 5))))
+    assert [reader.read_frame().sequence for _ in range(4)] == [1, 4, 5, 7]
+    assert reader.dropped == 3
+
+
+def test_is_plot_stream():
+    stream = io.BufferedReader(io.BytesIO(write_stream(1)))
+    assert is_plot_stream(stream)
+    assert PlotStreamReader(stream).read_frame().sequence == 1
+    assert not is_plot_stream(io.BufferedReader(io.BytesIO(b'Time|Card#|power\n')))
+    assert not is_plot_stream(io.BytesIO(write_stream(0)))